@@ -7,6 +7,7 @@ including chat, tool management, and configuration handling.
 """
 
 # Standard library imports
+import importlib.util
 import sys
 import logging
 import os
@@ -23,10 +24,11 @@ from .commands.stop import stop
 from .commands.status import status
 from .commands.init import init
 
+# Only check that chainlit is installed; importing it is slow, and the chainlit command
+# imports it when it runs
 try:
-    import chainlit
     from .commands.chainlit import run_chainlit_ui, setup_parser
-    has_chainlit = True
+    has_chainlit = importlib.util.find_spec("chainlit") is not None
 except ImportError:
     has_chainlit = False
 
@@ -106,13 +108,6 @@ openai_agents_logger.setLevel(logging.CRITICAL)
 # Initialize console for rich output
 console = Console()
 
-# Optional imports with fallbacks
-try:
-    from agents import set_tracing_disabled
-    set_tracing_disabled(disabled=True)
-except ImportError:
-    logger.debug("Agents package not installed. Tracing will not be disabled.")
-
 
 @click.group()
 @click.version_option(version=__version__)
@@ -9,12 +9,18 @@ import click
 # Set up logging
 logger = logging.getLogger(__name__)
 
-# Import Smart Agent components
+# Import Smart Agent components. The CLI agent pulls in the agents SDK, OpenAI and MCP
+# clients, so it is imported when a chat starts rather than whenever the CLI loads
 from ..tool_manager import ConfigManager
-from ..core.cli_agent import CLISmartAgent
 
-# Re-export the CLISmartAgent as SmartAgent for backward compatibility
-SmartAgent = CLISmartAgent
+
+def __getattr__(name):
+    """Resolve the agent class on first use, keeping the lazy import transparent to importers."""
+    # Re-export the CLISmartAgent as SmartAgent for backward compatibility
+    if name in ("CLISmartAgent", "SmartAgent"):
+        from ..core.cli_agent import CLISmartAgent
+        return CLISmartAgent
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 @click.command()
@@ -44,8 +50,26 @@ def chat(config, debug):
     configure_logging(config_manager, debug)
     
     # Create and run the chat using the CLI-specific agent
+    from ..core.cli_agent import CLISmartAgent
     chat_agent = CLISmartAgent(config_manager)
-    asyncio.run(chat_agent.run_chat_loop())
+    asyncio.run(run_chat_session(chat_agent))
+
+
+async def run_chat_session(chat_agent):
+    """
+    Run the chat loop and clean up the agent on the same event loop.
+
+    The whole session shares one loop, so the OpenAI client and MCP connections are
+    closed on the loop they were opened on, instead of by close() spinning up a new
+    loop once this one has already been torn down.
+
+    Args:
+        chat_agent: The CLISmartAgent to run
+    """
+    try:
+        await chat_agent.run_chat_loop()
+    finally:
+        await chat_agent.aclose()
 
 
 if __name__ == "__main__":
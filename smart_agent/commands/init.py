@@ -52,9 +52,6 @@ def init(config):
     Args:
         config: Path to configuration file
     """
-    # Create configuration manager
-    config_manager = ConfigManager(config_path=config)
-
     # Check if config files already exist before initializing
     config_file = os.path.join(os.getcwd(), "config.yaml")
     litellm_config_file = os.path.join(os.getcwd(), "litellm_config.yaml")
@@ -64,6 +61,9 @@ def init(config):
     
     # Initialize files as needed
     if not config_file_existed or not litellm_config_file_existed:
+        # Create configuration manager only when there is something to initialize,
+        # so running init again doesn't parse the existing configuration
+        config_manager = ConfigManager(config_path=config)
         config_file, litellm_config_file = initialize_config_files(config_manager)
         
         if config_file_existed:
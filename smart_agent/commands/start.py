@@ -61,15 +61,15 @@ def start_tools(
             started_tools[tool_id] = {"status": "already_running", "port": port}
             continue
 
-        # Get the transport type first
+        # Get the transport type and tool URL once; everything below reads these locals
         transport_type = tool_config.get("transport", "stdio_to_sse").lower()
+        tool_url = tool_config.get("url", "")
 
         # For sse transport type, check if a command is provided
         if transport_type == "sse":
             command = config_manager.get_tool_command(tool_id)
         # For sse_to_stdio transport type, we construct the command from the URL
         elif transport_type == "sse_to_stdio":
-            tool_url = tool_config.get("url")
             if tool_url:
                 command = f"npx -y supergateway --sse \"{tool_url}\""
                 if process_manager.debug:
@@ -86,8 +86,6 @@ def start_tools(
                 console.print(f"[yellow]Please add a 'command' field to the {tool_id} configuration in your tools.yaml file[/]")
                 continue
 
-        # Get the tool URL
-        tool_url = tool_config.get("url", "")
         url_port = None
         url_has_port_placeholder = False
         command_port = None
@@ -110,14 +108,20 @@ def start_tools(
                 except (IndexError, ValueError):
                     logger.debug(f"Could not extract port from command {command}")
 
+        # Parse the URL once; both the port and the hostname are read from the result
+        parsed_url = None
+        if tool_url:
+            try:
+                parsed_url = urllib.parse.urlparse(tool_url)
+            except Exception as e:
+                logger.debug(f"Could not parse URL {tool_url}: {e}")
+
         # Check if URL has a port placeholder
         if "{port}" in tool_url:
             url_has_port_placeholder = True
         # Try to extract port from URL using urllib.parse for any hostname
-        elif tool_url:
+        elif parsed_url is not None:
             try:
-                # Parse the URL properly
-                parsed_url = urllib.parse.urlparse(tool_url)
                 # Extract port from parsed URL
                 if parsed_url.port:
                     url_port = parsed_url.port
@@ -180,9 +184,6 @@ def start_tools(
             logger.warning(f"Tool {tool_id} URL specifies port {url_port} but will run on port {port}")
             console.print(f"[yellow]Warning: Tool {tool_id} URL specifies port {url_port} but will run on port {port}[/]")
 
-        # Get the transport type from the configuration
-        transport_type = tool_config.get("transport", "stdio_to_sse").lower()
-
         if process_manager.debug:
             logger.debug(f"Transport type for {tool_id}: '{transport_type}'")
             logger.debug(f"Original command for {tool_id}: '{command}'")
@@ -203,14 +204,10 @@ def start_tools(
             # For supergateway-based transport types
             # Determine if we need to add port parameters based on the command
             hostname = "localhost"
-            try:
-                parsed_url = urllib.parse.urlparse(tool_url)
+            if parsed_url is not None:
                 hostname = parsed_url.hostname or "localhost"
                 if process_manager.debug:
                     logger.debug(f"Extracted hostname '{hostname}' from URL '{tool_url}'")
-            except Exception as e:
-                if process_manager.debug:
-                    logger.debug(f"Error extracting hostname from URL '{tool_url}': {e}")
 
             # Handle different transport types
             if transport_type == "stdio_to_sse":
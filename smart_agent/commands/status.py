@@ -77,7 +77,7 @@ def get_tools_status(
         # Handle different transport types
         if transport_type == "sse":
             # Check if there's a command for this 'sse' tool
-            command = config_manager.get_tool_command(tool_id)
+            command = tool_config.get("command")
             if command:
                 # If there's a command, check if it's running locally
                 running = process_manager.is_tool_running(tool_id)
@@ -94,7 +94,7 @@ def get_tools_status(
             status["url"] = tool_config.get("url", "")
         elif transport_type in ["streamable-http", "streamable_http"]:
             # Check if there's a command for this streamable-http tool
-            command = config_manager.get_tool_command(tool_id)
+            command = tool_config.get("command")
             if command:
                 # If there's a command, check if it's running locally
                 running = process_manager.is_tool_running(tool_id)
@@ -105,9 +105,6 @@ def stop(config, all, debug):
         config: Path to configuration file
         all: Stop all processes, including those not in the configuration
     """
-    # Create configuration manager
-    config_manager = ConfigManager(config_path=config)
-
     # Create process manager and proxy manager with debug mode if requested
     process_manager = ProcessManager(debug=debug)
     proxy_manager = ProxyManager(debug=debug)
@@ -134,7 +131,8 @@ def stop(config, all, debug):
             else:
                 console.print(f"[yellow]{tool_id}: Failed to stop[/]")
     else:
-        # Stop configured tools
+        # Stop configured tools; only this path reads the configuration
+        config_manager = ConfigManager(config_path=config)
         stopped_tools = stop_tools(config_manager, process_manager)
 
         # Print summary
@@ -15,7 +15,12 @@ except ImportError:
 import asyncio
 import json
 import logging
+import datetime
+import functools
+import random
 import sys
+import time
+from email.utils import parsedate_to_datetime
 from typing import List, Dict, Any, Optional
 from contextlib import AsyncExitStack
 from collections import deque
@@ -35,19 +40,293 @@ mcp_client_logger.setLevel(logging.WARNING)
 # Import OpenAI agents components
 from agents import Agent, Runner, set_tracing_disabled, ItemHelpers
 from agents.mcp import MCPServer
-from agents import OpenAIChatCompletionsModel
+from agents import OpenAIChatCompletionsModel, ModelSettings
 set_tracing_disabled(disabled=True)
 
 # Import our custom MCP server implementations
 from .mcp_server import MCPServerSse, MCPServerStdio, MCPServerStreamableHttp
 
 # Import OpenAI client
-from openai import AsyncOpenAI
+import httpx
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
 
 # Import Smart Agent components
 from ..tool_manager import ConfigManager
 from ..agent import PromptGenerator
 
+# Tool call arguments and outputs are parsed on every tool event, so use orjson when
+# it is installed; it raises a subclass of json.JSONDecodeError, so callers can catch either
+try:
+    import orjson
+    json_loads = orjson.loads
+except ImportError:
+    orjson = None
+    json_loads = json.loads
+
+# Shared stdlib encoder for pretty-printing, instead of json.dumps(..., indent=2) setting one up per call
+_PRETTY_JSON = json.JSONEncoder(indent=2)
+
+
+def json_dumps_pretty(obj: Any) -> str:
+    """Pretty-print a tool payload with two-space indentation, using orjson when available."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode()
+        except TypeError:
+            pass  # e.g. integers wider than 64 bits, which the stdlib encoder handles
+    return _PRETTY_JSON.encode(obj)
+
+# Delays (in seconds) between MCP server connection attempts: 0.5 -> 1 -> 2, capped at 5
+MCP_CONNECT_RETRY_BASE_DELAY = 0.5
+MCP_CONNECT_RETRY_MAX_DELAY = 5.0
+MCP_CONNECT_MAX_RETRIES = 3
+MCP_CONNECT_RETRY_DELAYS = [
+    min(MCP_CONNECT_RETRY_BASE_DELAY * 2 ** i, MCP_CONNECT_RETRY_MAX_DELAY)
+    for i in range(MCP_CONNECT_MAX_RETRIES)
+]
+
+# Supported jitter strategies for the reconnect delay
+MCP_CONNECT_JITTER_MODES = ("full", "decorrelated", "none")
+
+
+def _jittered_delay(delay_cap: float, jitter: str, last_delay: float) -> float:
+    """
+    Apply jitter to a reconnect delay so that clients which lost the same server
+    don't all retry at the same instant.
+
+    Args:
+        delay_cap: The un-jittered delay from the backoff schedule
+        jitter: "full" for a uniform delay in [0, delay_cap], "decorrelated" for a uniform
+            delay in [base, 3 * last_delay] capped at the max delay, or "none"
+        last_delay: The previous delay actually slept, used by decorrelated jitter
+
+    Returns:
+        The delay in seconds
+    """
+    if jitter == "full":
+        return random.uniform(0, delay_cap)
+    if jitter == "decorrelated":
+        return min(MCP_CONNECT_RETRY_MAX_DELAY, random.uniform(MCP_CONNECT_RETRY_BASE_DELAY, last_delay * 3))
+    return delay_cap
+
+# WebSocket close codes for "Service Restart" and "Try Again Later"; like HTTP 429/503,
+# these tell us the server is deliberately unavailable rather than unreachable
+MCP_RETRY_LATER_CLOSE_CODES = (1012, 1013)
+MCP_RETRY_LATER_STATUS_CODES = (429, 503)
+
+
+def _get_retry_hint(error: BaseException) -> Optional[float]:
+    """
+    Extract a server-suggested reconnect delay from a connection error.
+
+    Walks the exception chain (including exception groups raised by the MCP transports)
+    looking for a ``retry_after`` attribute or an HTTP 429/503 response with a
+    ``Retry-After`` header.
+
+    Args:
+        error: The exception raised while connecting
+
+    Returns:
+        The suggested delay in seconds, 0.0 if the server asked to retry later without
+        saying when, or None if there is no hint
+    """
+    pending = [error]
+    seen = set()
+    while pending:
+        exc = pending.pop()
+        if exc is None or id(exc) in seen:
+            continue
+        seen.add(id(exc))
+
+        retry_after = getattr(exc, "retry_after", None)
+        if isinstance(retry_after, (int, float)):
+            return float(retry_after)
+
+        if isinstance(exc, httpx.HTTPStatusError) and exc.response.status_code in MCP_RETRY_LATER_STATUS_CODES:
+            header = exc.response.headers.get("Retry-After")
+            if not header:
+                return 0.0
+            try:
+                return max(float(header), 0.0)
+            except ValueError:
+                try:
+                    retry_at = parsedate_to_datetime(header)
+                    return max(retry_at.timestamp() - datetime.datetime.now(datetime.timezone.utc).timestamp(), 0.0)
+                except (TypeError, ValueError):
+                    return 0.0
+
+        if getattr(exc, "code", None) in MCP_RETRY_LATER_CLOSE_CODES:
+            return 0.0
+
+        pending.extend(getattr(exc, "exceptions", ()))
+        pending.append(exc.__cause__)
+        pending.append(exc.__context__)
+
+    return None
+
+
+@functools.cache
+def _load_langfuse_class():
+    """
+    Import the optional Langfuse client class once per process.
+
+    Failed imports aren't cached in sys.modules, so without this every new agent
+    (e.g. every Chainlit session) would repeat the module search when langfuse is missing.
+
+    Returns:
+        The Langfuse class, or None if the package is not installed
+    """
+    try:
+        from langfuse import Langfuse
+    except ImportError:
+        return None
+    return Langfuse
+
+
+# How long (in seconds) idle connections to the model API are kept open. httpx drops them
+# after 5s by default, which is shorter than a typical pause between chat turns, so every
+# turn would otherwise start with a fresh TCP/TLS handshake
+OPENAI_KEEPALIVE_EXPIRY = 60.0
+
+# Most concurrent connections to the model API. The web UI shares one client across all
+# chat sessions, and every pooled connection is kept alive, so a burst of concurrent turns
+# doesn't leave most of them reconnecting on the next turn
+OPENAI_MAX_CONNECTIONS = 100
+
+
+# Model settings for the chat agents. Allowing parallel tool calls lets the model request
+# several tools in one turn, which the agents runner then executes concurrently instead of
+# spending a model round trip per tool; it is only sent when the agent has tools
+AGENT_MODEL_SETTINGS = ModelSettings(parallel_tool_calls=True)
+
+
+def create_openai_client(base_url: str, api_key: str) -> AsyncOpenAI:
+    """
+    Create an AsyncOpenAI client whose pooled connections survive between chat turns.
+
+    The HTTP client is OpenAI's own default one, only with a longer keep-alive.
+
+    Args:
+        base_url: Base URL of the model API
+        api_key: API key for the model API
+
+    Returns:
+        The configured AsyncOpenAI client
+    """
+    return AsyncOpenAI(
+        base_url=base_url,
+        api_key=api_key,
+        max_retries=3,
+        timeout=30.0,
+        http_client=DefaultAsyncHttpxClient(
+            limits=httpx.Limits(
+                max_connections=OPENAI_MAX_CONNECTIONS,
+                max_keepalive_connections=OPENAI_MAX_CONNECTIONS,
+                keepalive_expiry=OPENAI_KEEPALIVE_EXPIRY,
+            )
+        ),
+    )
+
+
+# Configuration problems already reported in this process; agents are rebuilt per chat
+# session in the web UI, so without this the same warning would repeat for every session
+_reported_config_problems = set()
+
+
+def _warn_once(message: str):
+    """Log a configuration warning the first time it is seen, and at debug level afterwards."""
+    if message in _reported_config_problems:
+        logger.debug(message)
+        return
+    _reported_config_problems.add(message)
+    logger.warning(message)
+
+
+def describe_connection_error(error: BaseException) -> str:
+    """
+    Describe a connection error for logs and user-facing messages.
+
+    The MCP transports run inside task groups, so connection failures usually arrive as an
+    exception group whose own message ("unhandled errors in a TaskGroup") hides the cause.
+    In that case the first leaf sub-exception is reported as the root cause.
+
+    Args:
+        error: The exception raised while connecting
+
+    Returns:
+        A human-readable description of the error
+    """
+    root = error
+    while isinstance(root, BaseExceptionGroup) and root.exceptions:
+        root = root.exceptions[0]
+    if root is error:
+        return str(error)
+    return f"{error} (root: {root!r})"
+
+
+def assistant_message_text(item) -> str:
+    """
+    Extract the text of a message output item.
+
+    Equivalent to ItemHelpers.text_message_output, but returns the single text part of a
+    message as is (the common case) and joins multi-part messages in one pass instead of
+    concatenating them string by string.
+
+    Args:
+        item: The message output item from the run stream
+
+    Returns:
+        The text content of the message, without refusals
+    """
+    content = item.raw_item.content
+    if len(content) == 1:
+        part = content[0]
+        return part.text if part.type == "output_text" else ""
+    return "".join(part.text for part in content if part.type == "output_text")
+
+
+# Argument strings that models send for a tool called without arguments
+EMPTY_TOOL_ARGUMENTS = ("", "{}")
+
+
+def tool_call_arguments(item) -> Dict[str, Any]:
+    """
+    Parse the arguments of a tool call item.
+
+    Calls without arguments skip the JSON parser; some providers send an empty string for
+    these, which is not valid JSON.
+
+    Args:
+        item: The tool call item from the run stream
+
+    Returns:
+        The tool call arguments as a dictionary
+    """
+    arguments = item.raw_item.arguments
+    if arguments in EMPTY_TOOL_ARGUMENTS:
+        return {}
+    return json_loads(arguments)
+
+
+def tool_call_id(item) -> Optional[str]:
+    """
+    Get the call ID that pairs a tool call item with its output item.
+
+    With parallel tool calls, the outputs of one turn follow all of its calls, so the
+    call ID is what ties each output back to the call that produced it.
+
+    Args:
+        item: A tool call or tool call output item from the run stream
+
+    Returns:
+        The call ID, or None if the item doesn't carry one
+    """
+    raw_item = getattr(item, "raw_item", None)
+    # Call items carry a model object, output items a plain dict
+    if isinstance(raw_item, dict):
+        return raw_item.get("call_id")
+    return getattr(raw_item, "call_id", None)
+
 
 class BaseSmartAgent:
     """
@@ -60,12 +339,14 @@ class BaseSmartAgent:
     # Track whether cleanup has been performed
     _cleanup_done = False
 
-    def __init__(self, config_manager: ConfigManager):
+    def __init__(self, config_manager: ConfigManager, openai_client: Optional[AsyncOpenAI] = None):
         """
         Initialize the Base Smart Agent.
 
         Args:
             config_manager: Configuration manager instance
+            openai_client: Optional shared AsyncOpenAI client. A shared client is not
+                closed by aclose(), since other agents may still be using it.
         """
         self.config_manager = config_manager
         self.api_key = config_manager.get_api_key()
@@ -74,6 +355,8 @@ class BaseSmartAgent:
         self.temperature = config_manager.get_model_temperature()
         self.mcp_servers = []
         self.conversation_history = []
+        # Set by aclose() so pending connection retries stop waiting
+        self._shutdown = asyncio.Event()
         self.system_prompt = PromptGenerator.create_system_prompt()
         
         # Get Langfuse configuration
@@ -83,216 +366,279 @@ class BaseSmartAgent:
         
         # Initialize Langfuse if enabled
         if self.langfuse_enabled:
-            try:
-                from langfuse import Langfuse
-                
+            Langfuse = _load_langfuse_class()
+            if Langfuse is not None:
                 self.langfuse = Langfuse(
                     public_key=self.langfuse_config.get("public_key", ""),
                     secret_key=self.langfuse_config.get("secret_key", ""),
                     host=self.langfuse_config.get("host", "https://cloud.langfuse.com"),
                 )
                 logger.info("Langfuse monitoring enabled")
-            except ImportError:
+            else:
                 logger.warning("Langfuse package not installed. Run 'pip install langfuse' to enable monitoring.")
                 self.langfuse_enabled = False
         
-        # Initialize AsyncOpenAI client with proper connection management
-        import httpx
-        
-        # Create a custom HTTP client that completely avoids streaming issues
-        # by using a simpler configuration without connection pooling
-        self._http_client = None  # Don't use custom HTTP client to avoid streaming issues
-        
-        self.openai_client = AsyncOpenAI(
-            base_url=self.base_url,
-            api_key=self.api_key,
-            max_retries=3,
-            timeout=30.0,
-            # Don't pass custom http_client - let OpenAI use its own default
-        )
+        # Initialize AsyncOpenAI client; only close it on cleanup if this agent created it
+        self._owns_openai_client = openai_client is None
+        self.openai_client = openai_client or create_openai_client(self.base_url, self.api_key)
         
         # Initialize MCP servers list but don't connect yet
         self._setup_mcp_servers()
         
-    async def connect(self, validate=False, force=False):
+    async def connect(self, validate=False, force=False, jitter="full", deadline=None):
         """
         Asynchronously connect the agent, including connecting to MCP servers.
         This method should be called after creating the agent instance.
         If a connection error occurs, it will recreate the server with the same arguments
-        and try to connect again.
+        and try to connect again, waiting between attempts according to MCP_CONNECT_RETRY_DELAYS.
+
+        Args:
+            validate: Whether to ping each server after connecting
+            force: Whether to rebuild the MCP servers from configuration first
+            jitter: Jitter strategy for the retry delay, one of MCP_CONNECT_JITTER_MODES
+            deadline: Optional time budget in seconds for the whole call; once a retry would
+                overrun it, the remaining retries are skipped
         """
+        if jitter not in MCP_CONNECT_JITTER_MODES:
+            raise ValueError(f"Unknown jitter mode '{jitter}', expected one of {MCP_CONNECT_JITTER_MODES}")
+        
+        deadline_at = time.monotonic() + deadline if deadline is not None else None
         
         if force:
             self.mcp_servers = []
             self._setup_mcp_servers()
 
-        for i, server in enumerate(self.mcp_servers[:]):  # Create a copy of the list to iterate
+        async def connect_server(i, server):
             server_name = getattr(server, 'name', 'unknown')
-            
-            try:
-                logger.debug(f"Connecting to MCP server: {server_name}")
-                await server.connect()
-                if validate:
-                    await server.list_tools()
-                logger.debug(f"Connected to MCP server: {server_name}")
+            last_delay = MCP_CONNECT_RETRY_BASE_DELAY
 
-            except Exception as e:
-                logger.error(f"Error connecting to MCP server {server_name}: {e}")
-                
-                # Attempt to recreate the server with the same arguments
+            # This loop is the only retry site, so the delay schedule is predictable and bounded
+            for attempt in range(len(MCP_CONNECT_RETRY_DELAYS) + 1):
                 try:
-                    logger.info(f"Recreating MCP server {server_name} after connection error")
-                    
+                    logger.debug("Connecting to MCP server: %s", server_name)
+                    await server.connect()
+                    if validate:
+                        # Use a ping as the liveness probe rather than fetching the whole tool schema
+                        await server.ping()
+                    logger.debug("Connected to MCP server: %s", server_name)
+                    return
+
+                except Exception as e:
+                    logger.error(f"Error connecting to MCP server {server_name}: {describe_connection_error(e)}")
+
+                    if attempt >= len(MCP_CONNECT_RETRY_DELAYS):
+                        logger.error(f"Giving up on MCP server {server_name} after {attempt + 1} attempts")
+                        return
+
+                    delay = _jittered_delay(MCP_CONNECT_RETRY_DELAYS[attempt], jitter, last_delay)
+
+                    # Honour the server's own retry hint, up to the max delay so a long Retry-After
+                    # can't stall the connect; a bare "retry later" gets a randomized delay so
+                    # clients turned away together don't all come back at once
+                    retry_hint = _get_retry_hint(e)
+                    if retry_hint is not None:
+                        retry_hint = min(retry_hint, MCP_CONNECT_RETRY_MAX_DELAY)
+                        delay = max(delay, retry_hint or random.uniform(0, MCP_CONNECT_RETRY_MAX_DELAY))
+
+                    if deadline_at is not None and time.monotonic() + delay > deadline_at:
+                        logger.error(f"Giving up on MCP server {server_name}: retrying would exceed the {deadline}s connect deadline")
+                        return
+
+                    logger.info(f"Recreating MCP server {server_name} after connection error, retrying in {delay:.2f}s")
+                    if await self._wait_for_shutdown(delay):
+                        logger.debug(f"Agent is shutting down, abandoning connection to MCP server {server_name}")
+                        return
+                    last_delay = delay
+
                     # Create a new server of the same type with the same parameters
-                    new_server = None
-                    
-                    # Determine server type and recreate accordingly
-                    if isinstance(server, MCPServerSse):
-                        new_server = MCPServerSse(
-                            name=server.name,
-                            params=server.params,
-                            client_session_timeout_seconds=server.client_session_timeout_seconds
-                        )
-                    elif isinstance(server, MCPServerStdio):
-                        new_server = MCPServerStdio(
-                            name=server.name,
-                            params=server.params,
-                            client_session_timeout_seconds=server.client_session_timeout_seconds
-                        )
-                    elif isinstance(server, MCPServerStreamableHttp):
-                        new_server = MCPServerStreamableHttp(
-                            name=server.name,
-                            params=server.params,
-                            client_session_timeout_seconds=server.client_session_timeout_seconds
-                        )
-                    
-                    if new_server:
-                        # Replace the old server with the new one
-                        self.mcp_servers[i] = new_server
-                        
-                        # Try to connect with the new server
-                        logger.debug(f"Attempting to connect with recreated MCP server: {server_name}")
-                        await new_server.connect()
-                        logger.debug(f"Successfully connected to recreated MCP server: {server_name}")
-                    else:
+                    new_server = self._recreate_mcp_server(server)
+                    if new_server is None:
                         logger.error(f"Failed to recreate MCP server {server_name}: Unknown server type")
-                        
-                except Exception as e2:
-                    logger.error(f"Error reconnecting to recreated MCP server {server_name}: {e2}")
-                
+                        return
+
+                    # Replace the old server with the new one
+                    self.mcp_servers[i] = server = new_server
+
+        # Servers are independent, so connect (and retry) them concurrently; the total time
+        # is then bounded by the slowest server instead of the sum over all of them
+        await asyncio.gather(*(connect_server(i, server) for i, server in enumerate(self.mcp_servers[:])))
+
+    async def _wait_for_shutdown(self, timeout: float) -> bool:
+        """Wait up to timeout seconds for aclose(), returning True if the agent is shutting down."""
+        try:
+            await asyncio.wait_for(self._shutdown.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+        return self._shutdown.is_set()
+
+    def _recreate_mcp_server(self, server: MCPServer) -> Optional[MCPServer]:
+        """Create a fresh, unconnected copy of an MCP server with the same parameters."""
+        if not isinstance(server, (MCPServerSse, MCPServerStdio, MCPServerStreamableHttp)):
+            return None
+
+        return server.__class__(
+            name=server.name,
+            params=server.params,
+            client_session_timeout_seconds=server.client_session_timeout_seconds,
+            cache_tools_list=server._cache_tools_list
+        )
+
+    def _build_streamable_http(self, tool_id: str, tool_config: Dict[str, Any]) -> Optional[MCPServer]:
+        """Build an MCPServerStreamableHttp for the streamable-http transport."""
+        url = tool_config.get("url")
+        if not url:
+            _warn_once(f"Missing URL for streamable-http transport type for tool {tool_id}, skipping it")
+            return None
+
+        # Get timeout configurations from config
+        http_timeout = self.config_manager.get_tool_timeout(tool_id, "timeout", 30)
+        sse_read_timeout = self.config_manager.get_tool_timeout(tool_id, "sse_read_timeout", 300)
+        client_session_timeout = self.config_manager.get_tool_timeout(tool_id, "client_session_timeout", 30)
+
+        # Get headers if specified
+        headers = tool_config.get("headers", {})
+
+        logger.info(f"Adding MCP server {tool_id} at {url} with Streamable HTTP transport and timeouts: HTTP={http_timeout}s, SSE={sse_read_timeout}s, Session={client_session_timeout}s")
+        return MCPServerStreamableHttp(
+            name=tool_id,
+            params={
+                "url": url,
+                "headers": headers,
+                "timeout": http_timeout,  # HTTP request timeout
+                "sse_read_timeout": sse_read_timeout,  # SSE connection timeout for underlying streams
+                "http2": tool_config.get("http2", True),  # Multiplex requests over one connection
+            },
+            client_session_timeout_seconds=client_session_timeout,
+            cache_tools_list=tool_config.get("cache_tools_list", True)
+        )
+
+    def _build_sse(self, tool_id: str, tool_config: Dict[str, Any]) -> Optional[MCPServer]:
+        """Build an MCPServerSse for the SSE-based transports (stdio_to_sse, sse)."""
+        url = tool_config.get("url")
+        if not url:
+            _warn_once(f"Missing URL for SSE transport type for tool {tool_id}, skipping it")
+            return None
+
+        # Get timeout configurations from config
+        http_timeout = self.config_manager.get_tool_timeout(tool_id, "timeout", 30)
+        sse_read_timeout = self.config_manager.get_tool_timeout(tool_id, "sse_read_timeout", 300)
+        client_session_timeout = self.config_manager.get_tool_timeout(tool_id, "client_session_timeout", 30)
+
+        # Get headers if specified
+        headers = tool_config.get("headers", {})
+
+        logger.info(f"Adding MCP server {tool_id} at {url} with timeouts: HTTP={http_timeout}s, SSE={sse_read_timeout}s, Session={client_session_timeout}s")
+        return MCPServerSse(
+            name=tool_id,
+            params={
+                "url": url,
+                "headers": headers,
+                "timeout": http_timeout,  # HTTP request timeout
+                "sse_read_timeout": sse_read_timeout  # SSE connection timeout
+            },
+            client_session_timeout_seconds=client_session_timeout,
+            cache_tools_list=tool_config.get("cache_tools_list", True)
+        )
+
+    def _build_stdio(self, tool_id: str, tool_config: Dict[str, Any]) -> Optional[MCPServer]:
+        """Build an MCPServerStdio that runs the configured command directly."""
+        command = tool_config.get("command")
+        if not command:
+            _warn_once(f"Missing command for stdio transport type for tool {tool_id}, skipping it")
+            return None
+
+        # Get timeout configuration from config
+        client_session_timeout = self.config_manager.get_tool_timeout(tool_id, "client_session_timeout", 30)
+
+        # For MCPServerStdio, we need to split the command into command and args
+        command_parts = command.split()
+        executable = command_parts[0]
+        args = command_parts[1:] if len(command_parts) > 1 else []
+
+        # Get environment variables if specified
+        env = tool_config.get("env")
+
+        # Prepare params dictionary
+        params = {
+            "command": executable,
+            "args": args
+        }
+
+        # Add environment variables if specified
+        if env:
+            params["env"] = env
+            logger.info(f"Adding environment variables for MCP server {tool_id}")
+
+        logger.info(f"Adding MCP server {tool_id} with command '{command}' and session timeout: {client_session_timeout}s")
+        return MCPServerStdio(
+            name=tool_id,
+            params=params,
+            client_session_timeout_seconds=client_session_timeout,
+            cache_tools_list=tool_config.get("cache_tools_list", True)
+        )
+
+    def _build_sse_to_stdio(self, tool_id: str, tool_config: Dict[str, Any]) -> Optional[MCPServer]:
+        """Build an MCPServerStdio that bridges an SSE URL through supergateway."""
+        # Get the URL from the configuration
+        url = tool_config.get("url")
+        if not url:
+            _warn_once(f"Missing URL for sse_to_stdio transport type for tool {tool_id}, skipping it")
+            return None
+
+        # Get timeout configuration from config
+        client_session_timeout = self.config_manager.get_tool_timeout(tool_id, "client_session_timeout", 30)
+
+        # Construct the full supergateway command
+        command = f"npx -y supergateway --sse \"{url}\""
+        logger.debug(f"Constructed command for sse_to_stdio transport: '{command}'")
+        # For MCPServerStdio, we need to split the command into command and args
+        command_parts = command.split()
+        executable = command_parts[0]
+        args = command_parts[1:] if len(command_parts) > 1 else []
+
+        logger.info(f"Adding MCP server {tool_id} with sse_to_stdio transport and session timeout: {client_session_timeout}s")
+        return MCPServerStdio(
+            name=tool_id,
+            params={
+                "command": executable,
+                "args": args
+            },
+            client_session_timeout_seconds=client_session_timeout,
+            cache_tools_list=tool_config.get("cache_tools_list", True)
+        )
+
+    # Map each transport type to the builder that constructs its MCP server
+    _TRANSPORT_BUILDERS = {
+        "streamable-http": _build_streamable_http,
+        "streamable_http": _build_streamable_http,
+        "stdio_to_sse": _build_sse,
+        "sse": _build_sse,
+        "stdio": _build_stdio,
+        "sse_to_stdio": _build_sse_to_stdio,
+    }
+
     def _setup_mcp_servers(self):
         """Set up MCP server objects based on configuration."""
-        # Get enabled tools
+        transport_builders = self._TRANSPORT_BUILDERS
+        add_server = self.mcp_servers.append
+
+        # Get enabled tools, reading the flag from the config we are already iterating
+        # instead of looking each tool up again through is_tool_enabled()
         for tool_id, tool_config in self.config_manager.get_tools_config().items():
-            if not self.config_manager.is_tool_enabled(tool_id):
+            if not tool_config.get("enabled", False):
+                continue
+
+            transport_type = tool_config.get("transport", "stdio_to_sse")
+
+            # Transports are normally written in lowercase already, so only lowercase on a miss
+            builder = transport_builders.get(transport_type) or transport_builders.get(transport_type.lower())
+            if builder is None:
+                _warn_once(f"Unknown transport type '{transport_type}' for tool {tool_id}, skipping it")
                 continue
-                
-            transport_type = tool_config.get("transport", "stdio_to_sse").lower()
-            
-            # For Streamable HTTP transport, use MCPServerStreamableHttp
-            if transport_type in ["streamable-http", "streamable_http"]:
-                url = tool_config.get("url")
-                if url:
-                    # Get timeout configurations from config
-                    http_timeout = self.config_manager.get_tool_timeout(tool_id, "timeout", 30)
-                    sse_read_timeout = self.config_manager.get_tool_timeout(tool_id, "sse_read_timeout", 300)
-                    client_session_timeout = self.config_manager.get_tool_timeout(tool_id, "client_session_timeout", 30)
-                    
-                    # Get headers if specified
-                    headers = tool_config.get("headers", {})
-                    
-                    logger.info(f"Adding MCP server {tool_id} at {url} with Streamable HTTP transport and timeouts: HTTP={http_timeout}s, SSE={sse_read_timeout}s, Session={client_session_timeout}s")
-                    self.mcp_servers.append(MCPServerStreamableHttp(
-                        name=tool_id,
-                        params={
-                            "url": url,
-                            "headers": headers,
-                            "timeout": http_timeout,  # HTTP request timeout
-                            "sse_read_timeout": sse_read_timeout  # SSE connection timeout for underlying streams
-                        },
-                        client_session_timeout_seconds=client_session_timeout
-                    ))
-            # For SSE-based transports (stdio_to_sse, sse), use MCPServerSse
-            elif transport_type in ["stdio_to_sse", "sse"]:
-                url = tool_config.get("url")
-                if url:
-                    # Get timeout configurations from config
-                    http_timeout = self.config_manager.get_tool_timeout(tool_id, "timeout", 30)
-                    sse_read_timeout = self.config_manager.get_tool_timeout(tool_id, "sse_read_timeout", 300)
-                    client_session_timeout = self.config_manager.get_tool_timeout(tool_id, "client_session_timeout", 30)
-                    
-                    logger.info(f"Adding MCP server {tool_id} at {url} with timeouts: HTTP={http_timeout}s, SSE={sse_read_timeout}s, Session={client_session_timeout}s")
-                    self.mcp_servers.append(MCPServerSse(
-                        name=tool_id,
-                        params={
-                            "url": url,
-                            "timeout": http_timeout,  # HTTP request timeout
-                            "sse_read_timeout": sse_read_timeout  # SSE connection timeout
-                        },
-                        client_session_timeout_seconds=client_session_timeout
-                    ))
-            # For stdio transport, use MCPServerStdio with the command directly
-            elif transport_type == "stdio":
-                command = tool_config.get("command")
-                if command:
-                    # Get timeout configuration from config
-                    client_session_timeout = self.config_manager.get_tool_timeout(tool_id, "client_session_timeout", 30)
-                    
-                    # For MCPServerStdio, we need to split the command into command and args
-                    command_parts = command.split()
-                    executable = command_parts[0]
-                    args = command_parts[1:] if len(command_parts) > 1 else []
-                    
-                    # Get environment variables if specified
-                    env = tool_config.get("env")
-                    
-                    # Prepare params dictionary
-                    params = {
-                        "command": executable,
-                        "args": args
-                    }
-                    
-                    # Add environment variables if specified
-                    if env:
-                        params["env"] = env
-                        logger.info(f"Adding environment variables for MCP server {tool_id}")
-                    
-                    logger.info(f"Adding MCP server {tool_id} with command '{command}' and session timeout: {client_session_timeout}s")
-                    self.mcp_servers.append(MCPServerStdio(
-                        name=tool_id,
-                        params=params,
-                        client_session_timeout_seconds=client_session_timeout
-                    ))
-            # For sse_to_stdio transport, always construct the command from the URL
-            elif transport_type == "sse_to_stdio":
-                # Get the URL from the configuration
-                url = tool_config.get("url")
-                if url:
-                    # Get timeout configuration from config
-                    client_session_timeout = self.config_manager.get_tool_timeout(tool_id, "client_session_timeout", 30)
-                    
-                    # Construct the full supergateway command
-                    command = f"npx -y supergateway --sse \"{url}\""
-                    logger.debug(f"Constructed command for sse_to_stdio transport: '{command}'")
-                    # For MCPServerStdio, we need to split the command into command and args
-                    command_parts = command.split()
-                    executable = command_parts[0]
-                    args = command_parts[1:] if len(command_parts) > 1 else []
-                    
-                    logger.info(f"Adding MCP server {tool_id} with sse_to_stdio transport and session timeout: {client_session_timeout}s")
-                    self.mcp_servers.append(MCPServerStdio(
-                        name=tool_id,
-                        params={
-                            "command": executable,
-                            "args": args
-                        },
-                        client_session_timeout_seconds=client_session_timeout
-                    ))
-                else:
-                    logger.warning(f"Missing URL for sse_to_stdio transport type for tool {tool_id}")
-            # For any other transport types, log a warning
-            else:
-                logger.warning(f"Unknown transport type '{transport_type}' for tool {tool_id}")
+
+            server = builder(self, tool_id, tool_config)
+            if server is not None:
+                add_server(server)
 
     @abstractmethod
     async def process_query(self, query: str, history: List[Dict[str, str]] = None, agent=None) -> str:
@@ -326,22 +672,28 @@ class BaseSmartAgent:
         # Mark cleanup as done to prevent multiple cleanups
         self._cleanup_done = True
         
-        # Clean up MCP servers
-        for server in self.mcp_servers:
+        # Wake any connect() that is waiting to retry so it gives up immediately
+        self._shutdown.set()
+        
+        # Clean up MCP servers concurrently, each with its own timeout
+        async def cleanup_server(server):
             try:
                 await asyncio.wait_for(server.cleanup(), timeout=5.0)
             except asyncio.TimeoutError:
                 logger.warning(f"Timeout cleaning up MCP server {getattr(server, 'name', 'unknown')}")
             except Exception as e:
                 logger.error(f"Error closing MCP server {getattr(server, 'name', 'unknown')}: {e}")
+
+        await asyncio.gather(*(cleanup_server(server) for server in self.mcp_servers))
         
         # Clean up OpenAI client and underlying HTTP client
         try:
-            # First close the OpenAI client
-            if hasattr(self.openai_client, 'close'):
-                await asyncio.wait_for(self.openai_client.close(), timeout=5.0)
-            elif hasattr(self.openai_client, 'aclose'):
-                await asyncio.wait_for(self.openai_client.aclose(), timeout=5.0)
+            # First close the OpenAI client, unless it is shared with other agents
+            if self._owns_openai_client:
+                if hasattr(self.openai_client, 'close'):
+                    await asyncio.wait_for(self.openai_client.close(), timeout=5.0)
+                elif hasattr(self.openai_client, 'aclose'):
+                    await asyncio.wait_for(self.openai_client.aclose(), timeout=5.0)
                 
         except asyncio.TimeoutError:
             logger.warning("Timeout closing OpenAI client")
@@ -384,7 +736,8 @@ class BaseSmartAgent:
                 # No running event loop, we can create one
                 pass
             
-            # Try to get or create an event loop for cleanup
+            # Reuse the idle event loop if there is one, otherwise create a temporary one
+            temporary_loop = False
             try:
                 loop = asyncio.get_event_loop()
                 if loop.is_closed():
@@ -393,6 +746,7 @@ class BaseSmartAgent:
                 # Create a new event loop
                 loop = asyncio.new_event_loop()
                 asyncio.set_event_loop(loop)
+                temporary_loop = True
             
             # Run the async cleanup with a timeout
             try:
@@ -401,6 +755,11 @@ class BaseSmartAgent:
                 logger.warning("Cleanup timed out after 5 seconds")
             except Exception as e:
                 logger.error(f"Error during async cleanup: {e}")
+            finally:
+                # A loop created just for cleanup would otherwise leak its selector
+                if temporary_loop:
+                    asyncio.set_event_loop(None)
+                    loop.close()
                 
         except Exception as e:
             logger.error(f"Error during synchronous cleanup: {e}")
@@ -409,6 +768,10 @@ class BaseSmartAgent:
     
     def _cleanup_callback(self, task):
         """Callback to handle cleanup task completion."""
+        if task.cancelled():
+            # The loop was shutting down before the cleanup could finish
+            logger.debug("Async cleanup task was cancelled")
+            return
         try:
             task.result()  # This will raise any exception that occurred
         except Exception as e:
@@ -8,6 +8,7 @@ with features tailored for the Chainlit web interface.
 import asyncio
 import json
 import logging
+import time
 from typing import List, Dict, Any, Optional
 from contextlib import AsyncExitStack
 from openai.types.responses import ResponseTextDeltaEvent
@@ -19,11 +20,23 @@ from chainlit.message import Message
 # Set up logging
 logger = logging.getLogger(__name__)
 
+# Minimum time (in seconds) between agent step updates; each update resends the whole
+# step output, so bursts of tool events are coalesced into one update per interval
+AGENT_STEP_UPDATE_INTERVAL = 0.1
+
 # Import base SmartAgent
-from .agent import BaseSmartAgent
+from .agent import (
+    BaseSmartAgent,
+    assistant_message_text,
+    describe_connection_error,
+    json_dumps_pretty,
+    json_loads,
+    tool_call_arguments,
+    tool_call_id,
+)
 
 # Import helpers
-from agents import ItemHelpers
+from agents import Runner
 
 
 class ChainlitSmartAgent(BaseSmartAgent):
@@ -39,17 +52,26 @@ class ChainlitSmartAgent(BaseSmartAgent):
         super().__init__(*args, **kwargs)
         # Dictionary to store MCP sessions: {server_name: (client_session, exit_stack)}
         self.mcp_sessions = {}
+        # Set when the session is being torn down, to abort in-flight MCP connections
+        self.closing = asyncio.Event()
         
-    async def connect_mcp_servers(self, mcp_servers_objects, shared_exit_stack=None):
+    async def connect_mcp_servers(self, mcp_servers_objects, shared_exit_stack=None, timeout=10.0, cancel_event=None):
         """
         Connect to MCP servers with improved session management for Chainlit interface.
         
+        All servers are connected concurrently, each with its own timeout, so one slow
+        server doesn't delay the others. If the cancel event is set while connections are
+        still in flight, they are aborted and CancelledError is raised.
+        
         Args:
             mcp_servers_objects: List of MCP server objects to connect to
             shared_exit_stack: Optional AsyncExitStack to use for connection management
+            timeout: Timeout in seconds for connecting to each server
+            cancel_event: Optional asyncio.Event that aborts pending connections when set.
+                Defaults to this agent's `closing` event.
                 
         Returns:
-            List of successfully connected MCP server objects
+            Tuple of (successfully connected MCP server objects, connection error messages)
         """
         mcp_servers = []
         connection_errors = []
@@ -57,52 +79,119 @@ class ChainlitSmartAgent(BaseSmartAgent):
         # If no servers to connect to, return empty list
         if not mcp_servers_objects:
             logger.info("No MCP servers to connect to")
-            return mcp_servers
+            return mcp_servers, connection_errors
             
-        logger.info(f"Connecting to {len(mcp_servers_objects)} MCP servers...")
-            
-        for server in mcp_servers_objects:
-            server_name = getattr(server, 'name', 'unknown')
-            
-            try:
-                # For each server, decide which exit stack to use
-                exit_stack = shared_exit_stack if shared_exit_stack else server.exit_stack
-                
-                logger.debug(f"Connecting to MCP server: {server_name}")
-                
-                # Use timeout for connection to prevent hanging
-                connected_server = await asyncio.wait_for(
-                    exit_stack.enter_async_context(server),
-                    timeout=10.0
-                )
-                
-                mcp_servers.append(connected_server)
-                logger.debug(f"Connected to MCP server: {server_name}")
-                self.mcp_sessions[server_name] = (connected_server, exit_stack)
+        logger.info("Connecting to %d MCP servers...", len(mcp_servers_objects))
+
+        async def connect_server(server):
+            # For each server, decide which exit stack to use
+            exit_stack = shared_exit_stack if shared_exit_stack else server.exit_stack
+            logger.debug("Connecting to MCP server: %s", getattr(server, 'name', 'unknown'))
+            connected_server = await asyncio.wait_for(
+                exit_stack.enter_async_context(server),
+                timeout=timeout
+            )
+            return connected_server, exit_stack
+
+        if cancel_event is None:
+            cancel_event = self.closing
 
-            except asyncio.TimeoutError:
+        connect_tasks = [asyncio.create_task(connect_server(server)) for server in mcp_servers_objects]
+        results_future = asyncio.gather(*connect_tasks, return_exceptions=True)
+        cancel_waiter = asyncio.create_task(cancel_event.wait())
+        try:
+            await asyncio.wait([results_future, cancel_waiter], return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            cancel_waiter.cancel()
+            if not results_future.done():
+                # Abort in-flight connections instead of letting them run to their timeout
+                for task in connect_tasks:
+                    task.cancel()
+                await asyncio.gather(*connect_tasks, return_exceptions=True)
+
+        if cancel_event.is_set():
+            logger.info("Session is closing, aborted connecting to MCP servers")
+            # Servers that connected before the abort are never pooled in mcp_sessions, so
+            # close their own exit stacks here; a shared exit stack is closed by its owner
+            for task in connect_tasks:
+                if task.cancelled() or task.exception() is not None:
+                    continue
+                _, exit_stack = task.result()
+                if exit_stack is shared_exit_stack:
+                    continue
+                try:
+                    await asyncio.wait_for(exit_stack.aclose(), timeout=5.0)
+                except (asyncio.TimeoutError, Exception) as e:
+                    logger.debug(f"Timeout or error closing aborted MCP connection: {e}")
+            raise asyncio.CancelledError()
+
+        results = results_future.result()
+
+        for server, result in zip(mcp_servers_objects, results):
+            server_name = getattr(server, 'name', 'unknown')
+            if isinstance(result, asyncio.TimeoutError):
                 error_msg = f"Timeout connecting to MCP server: {server_name}"
                 logger.warning(error_msg)
                 connection_errors.append(error_msg)
-            except asyncio.CancelledError:
+            elif isinstance(result, asyncio.CancelledError):
                 logger.info(f"Connection cancelled for MCP server: {server_name}")
-                raise  # Re-raise to properly handle cancellation
-            except Exception as e:
-                error_msg = f"Error connecting to MCP server {server_name}: {e}"
+                raise result  # Re-raise to properly handle cancellation
+            elif isinstance(result, BaseException):
+                error_msg = f"Error connecting to MCP server {server_name}: {describe_connection_error(result)}"
                 logger.error(error_msg)
                 connection_errors.append(error_msg)
+            else:
+                connected_server, exit_stack = result
+                mcp_servers.append(connected_server)
+                logger.debug("Connected to MCP server: %s", server_name)
+                self.mcp_sessions[server_name] = (connected_server, exit_stack)
         
         # Log summary of connections
         if mcp_servers:
-            logger.info(f"Successfully connected to {len(mcp_servers)} MCP servers")
+            logger.info("Successfully connected to %d MCP servers", len(mcp_servers))
         else:
             logger.warning("Failed to connect to any MCP servers")
             
         if connection_errors:
             logger.warning(f"Connection errors occurred: {'; '.join(connection_errors)}")
                 
-        return mcp_servers
+        return mcp_servers, connection_errors
             
+    async def get_mcp_servers(self, timeout=10.0):
+        """
+        Get connected MCP servers, reusing the connections pooled by earlier messages.
+        
+        Only servers without a live pooled session are connected, so after the first
+        message a turn normally pays no connection handshakes at all.
+        
+        Args:
+            timeout: Timeout in seconds for connecting to each server
+            
+        Returns:
+            Tuple of (connected MCP server objects, connection error messages)
+        """
+        pending = []
+        stale = []
+        for server in self.mcp_servers:
+            session = self.mcp_sessions.get(server.name)
+            if session is None:
+                pending.append(server)
+            elif not session[0].client.is_connected():
+                # The pooled connection has dropped, so replace it with a fresh one
+                stale.append(server.name)
+                pending.append(server)
+        
+        if stale:
+            logger.info(f"Reconnecting to dropped MCP servers: {', '.join(stale)}")
+            await self.disconnect_mcp_servers(stale)
+        
+        # Each server is entered on its own exit stack so it outlives this call
+        _, connection_errors = await self.connect_mcp_servers(pending, timeout=timeout)
+        
+        # Keep the configured server order regardless of which ones were just connected
+        mcp_servers = [self.mcp_sessions[server.name][0] for server in self.mcp_servers if server.name in self.mcp_sessions]
+        return mcp_servers, connection_errors
+    
     async def disconnect_mcp_servers(self, server_names=None):
         """
         Disconnect from MCP servers and clean up resources.
@@ -127,46 +216,48 @@ class ChainlitSmartAgent(BaseSmartAgent):
         
         disconnected_servers = []
         disconnect_errors = []
+
+        async def disconnect_server(name):
+            client_session, exit_stack = self.mcp_sessions[name]
+            logger.debug(f"Disconnecting from MCP server: {name}")
             
-        for name in server_names:
-            if name in self.mcp_sessions:
-                client_session, exit_stack = self.mcp_sessions[name]
-                logger.debug(f"Disconnecting from MCP server: {name}")
+            try:
+                # If the client session has a shutdown method, call it
+                if hasattr(client_session, 'shutdown') and callable(getattr(client_session, 'shutdown')):
+                    try:
+                        await asyncio.wait_for(client_session.shutdown(), timeout=3.0)
+                        logger.debug(f"Shutdown called for MCP server: {name}")
+                    except (asyncio.TimeoutError, Exception) as e:
+                        logger.debug(f"Timeout or error during shutdown of MCP server {name}: {e}")
                 
-                try:
-                    # If the client session has a shutdown method, call it
-                    if hasattr(client_session, 'shutdown') and callable(getattr(client_session, 'shutdown')):
-                        try:
-                            await asyncio.wait_for(client_session.shutdown(), timeout=3.0)
-                            logger.debug(f"Shutdown called for MCP server: {name}")
-                        except (asyncio.TimeoutError, Exception) as e:
-                            logger.debug(f"Timeout or error during shutdown of MCP server {name}: {e}")
-                    
-                    # If the client session has a cleanup method, call it
-                    if hasattr(client_session, 'cleanup') and callable(getattr(client_session, 'cleanup')):
-                        try:
-                            await asyncio.wait_for(client_session.cleanup(), timeout=3.0)
-                            logger.debug(f"Cleanup called for MCP server: {name}")
-                        except (asyncio.TimeoutError, Exception) as e:
-                            logger.debug(f"Timeout or error during cleanup of MCP server {name}: {e}")
-                    
-                    # Close the exit stack which will clean up all resources
-                    # Use a shorter timeout to avoid hanging
+                # If the client session has a cleanup method, call it
+                if hasattr(client_session, 'cleanup') and callable(getattr(client_session, 'cleanup')):
                     try:
-                        await asyncio.wait_for(exit_stack.aclose(), timeout=5.0)
-                    except asyncio.TimeoutError:
-                        logger.warning(f"Timeout closing exit stack for MCP server {name}")
-                    
-                    logger.info(f"Successfully disconnected from MCP server: {name}")
-                    disconnected_servers.append(name)
-                except Exception as e:
-                    error_msg = f"Error disconnecting from MCP server {name}: {e}"
-                    logger.error(error_msg)
-                    disconnect_errors.append(error_msg)
-                finally:
-                    # Always remove the session from our tracking dict
-                    del self.mcp_sessions[name]
-        
+                        await asyncio.wait_for(client_session.cleanup(), timeout=3.0)
+                        logger.debug(f"Cleanup called for MCP server: {name}")
+                    except (asyncio.TimeoutError, Exception) as e:
+                        logger.debug(f"Timeout or error during cleanup of MCP server {name}: {e}")
+                
+                # Close the exit stack which will clean up all resources
+                # Use a shorter timeout to avoid hanging
+                try:
+                    await asyncio.wait_for(exit_stack.aclose(), timeout=5.0)
+                except asyncio.TimeoutError:
+                    logger.warning(f"Timeout closing exit stack for MCP server {name}")
+                
+                logger.info(f"Successfully disconnected from MCP server: {name}")
+                disconnected_servers.append(name)
+            except Exception as e:
+                error_msg = f"Error disconnecting from MCP server {name}: {e}"
+                logger.error(error_msg)
+                disconnect_errors.append(error_msg)
+            finally:
+                # Always remove the session from our tracking dict
+                del self.mcp_sessions[name]
+
+        # Each server has its own exit stack, so they are all closed concurrently
+        await asyncio.gather(*(disconnect_server(name) for name in server_names if name in self.mcp_sessions))
+
         # Log summary of disconnections
         if disconnected_servers:
             logger.info(f"Successfully disconnected from {len(disconnected_servers)} MCP servers")
@@ -186,6 +277,9 @@ class ChainlitSmartAgent(BaseSmartAgent):
         logger.info("Cleaning up ChainlitSmartAgent resources")
         success = True
         
+        # Abort any MCP connections that are still being established
+        self.closing.set()
+        
         try:
             # Get the number of active sessions before cleanup
             active_sessions = len(self.mcp_sessions)
@@ -243,14 +337,14 @@ class ChainlitSmartAgent(BaseSmartAgent):
             
         # Initialize state if needed
         if state is not None:
-            state["assistant_reply"] = ""
+            # Reply parts are collected in a list and joined once at the end of the run
+            state["assistant_reply"] = []
             state["tool_count"] = 0
             
         # The agent_step is now created in chainlit_app.py
 
         try:
             # Run the agent with streaming
-            from agents import Runner
             result = Runner.run_streamed(agent, history, max_turns=100)
             
             # Process the stream events using handle_event with individual error handling
@@ -274,6 +368,11 @@ class ChainlitSmartAgent(BaseSmartAgent):
                     except Exception:
                         pass
             
+            # The final update below sends the latest step content, so drop any deferred one
+            flush_task = state.get("step_flush_task") if state is not None else None
+            if flush_task is not None:
+                flush_task.cancel()
+
             # Update the final step name to show a more descriptive summary
             if state is not None and "agent_step" in state and state.get("tool_count", 0) > 0:
                 try:
@@ -299,7 +398,7 @@ class ChainlitSmartAgent(BaseSmartAgent):
             
             # Get the accumulated assistant reply from state if available
             if state is not None and "assistant_reply" in state:
-                return state["assistant_reply"].strip()
+                return "".join(state["assistant_reply"]).strip()
             return ""
             
         except asyncio.CancelledError:
@@ -333,121 +432,10 @@ class ChainlitSmartAgent(BaseSmartAgent):
 
             item = event.item
 
-            # Handle tool call
-            if item.type == "tool_call_item":
-                try:
-                    # Parse arguments as JSON
-                    arguments_dict = json.loads(item.raw_item.arguments)
-                    
-                    # Check if this is a thought tool call
-                    if "thought" in arguments_dict:
-                        state["is_thought"] = True
-                        value = arguments_dict["thought"]
-                        
-                        # Increment tool count and thinking count
-                        if state:
-                            state["tool_count"] = state.get("tool_count", 0) + 1
-                            state["thinking_count"] = state.get("thinking_count", 0) + 1
-                            
-                        # Update the agent step with the thought
-                        if state and "agent_step" in state:
-                            agent_step = state["agent_step"]
-                            current_count = state.get("tool_count", 0)
-                            
-                            # Update the step content
-                            if agent_step.output:
-                                agent_step.output += f"\n\n**Step {current_count}: Thinking**\n{value}"
-                            else:
-                                agent_step.output = f"**Step {current_count}: Thinking**\n{value}"
-                                
-                            # Update the step name to flow naturally after "Using"/"Used" prefix
-                            agent_step.name = f"thinking to analyze the request"
-                            await agent_step.update()
-                    else:
-                        # Get the tool name
-                        tool_name = item.raw_item.name if hasattr(item.raw_item, 'name') else "tool"
-                        
-                        # Format the arguments
-                        formatted_input = {}
-                        for arg_key, arg_value in arguments_dict.items():
-                            formatted_input[arg_key] = arg_value
-                            
-                        # Format the input as a string
-                        input_str = json.dumps(formatted_input, indent=2)
-                        
-                        # Increment tool count
-                        if state:
-                            state["tool_count"] = state.get("tool_count", 0) + 1
-                            state["current_tool"] = tool_name
-                            state["current_tool_count"] = state.get("tool_count", 0)
-                            
-                        # Update the agent step with the tool call
-                        if state and "agent_step" in state:
-                            agent_step = state["agent_step"]
-                            current_count = state.get("tool_count", 0)
-                            
-                            # Update the step content
-                            if agent_step.output:
-                                agent_step.output += f"\n\n**Step {current_count}: {tool_name}**\n```json\n{input_str}\n```"
-                            else:
-                                agent_step.output = f"**Step {current_count}: {tool_name}**\n```json\n{input_str}\n```"
-                                
-                            # Update the step name to flow naturally after "Using"/"Used" prefix
-                            agent_step.name = f"{tool_name} to process the request"
-                            await agent_step.update()
-                except Exception as e:
-                    error_text = f"Error parsing tool call: {e}"
-                    await assistant_msg.stream_token(f"\n<error>{error_text}</error>")
-                    logger.error(f"Error processing tool call: {e}")
-
-            # Handle tool output
-            elif item.type == "tool_call_output_item":
-                if state and state.get("is_thought"):
-                    state["is_thought"] = False  # Reset thought flag
-                    return  # Skip processing thought outputs
-                    
-                try:
-                    # Try to parse output as JSON
-                    try:
-                        output_json = json.loads(item.output)
-                        output_content = output_json.get('text', json.dumps(output_json, indent=2))
-                    except json.JSONDecodeError:
-                        output_content = item.output
-                    
-                    # Update the agent step with the tool output
-                    if state and "agent_step" in state and state.get("current_tool_count"):
-                        agent_step = state["agent_step"]
-                        
-                        # Add the tool output to the existing output with more context
-                        agent_step.output += f"\n\n**Output from {state.get('current_tool', 'tool')}:**\n```\n{str(output_content)}\n```"
-                        
-                        # Update the step name to flow naturally after "Using"/"Used" prefix
-                        agent_step.name = f"{state.get('current_tool', 'tool')} to process the result"
-                        
-                        # Update the step
-                        await agent_step.update()
-                        
-                        # Clear the current tool count from state
-                        state["current_tool_count"] = None
-                    else:
-                        # If we don't have a step, fall back to the old behavior
-                        full_output = f"\n<tool_output>\n{str(output_content)}\n</tool_output>\n"
-                        
-                        # For tool outputs, update the message directly
-                        if hasattr(assistant_msg, 'original_message'):
-                            assistant_msg.original_message.content += full_output
-                            await assistant_msg.original_message.update()
-                        else:
-                            assistant_msg.content += full_output
-                            await assistant_msg.update()
-                except Exception as e:
-                    logger.error(f"Error processing tool output: {e}")
-                    await assistant_msg.stream_token(f"\n<error>Error processing tool output: {e}</error>")
-                    
-            # Handle final assistant message
-            elif item.type == "message_output_item":
-                if item.raw_item.role == "assistant" and state and "assistant_reply" in state:
-                    state["assistant_reply"] += ItemHelpers.text_message_output(item)
+            # Dispatch on the item type with a single dict lookup
+            handler = self._ITEM_HANDLERS.get(item.type)
+            if handler is not None:
+                await handler(self, item, state, assistant_msg)
                 
         except asyncio.CancelledError:
             logger.debug("Event handling was cancelled")
@@ -463,4 +451,149 @@ class ChainlitSmartAgent(BaseSmartAgent):
                     assistant_msg.content += error_msg
                     await assistant_msg.update()
             except Exception as stream_error:
-                logger.error(f"Failed to stream error message: {stream_error}")
\ No newline at end of file
+                logger.error(f"Failed to stream error message: {stream_error}")
+
+    async def _update_agent_step(self, state):
+        """Send the agent step to the UI, at most once per AGENT_STEP_UPDATE_INTERVAL.
+
+        Updates that arrive too soon after the previous one are deferred to a single
+        trailing update, which sends whatever the step contains by then.
+        """
+        flush_task = state.get("step_flush_task")
+        if flush_task is not None and not flush_task.done():
+            return  # A deferred update is already scheduled
+
+        elapsed = time.monotonic() - state.get("step_updated_at", 0.0)
+        if elapsed >= AGENT_STEP_UPDATE_INTERVAL:
+            state["step_updated_at"] = time.monotonic()
+            await state["agent_step"].update()
+        else:
+            state["step_flush_task"] = asyncio.create_task(
+                self._flush_agent_step(state, AGENT_STEP_UPDATE_INTERVAL - elapsed)
+            )
+
+    async def _flush_agent_step(self, state, delay):
+        """Send a deferred agent step update after the given delay."""
+        await asyncio.sleep(delay)
+        state["step_updated_at"] = time.monotonic()
+        try:
+            await state["agent_step"].update()
+        except Exception as e:
+            logger.error(f"Error updating agent step: {e}")
+
+    async def _handle_tool_call(self, item, state, assistant_msg):
+        """Record a tool call (or a thought) on the agent step."""
+        try:
+            # Parse arguments as JSON
+            arguments_dict = tool_call_arguments(item)
+
+            # Check if this is a thought tool call
+            if "thought" in arguments_dict:
+                # Thought outputs are skipped, so remember which call they belong to
+                state.setdefault("thought_calls", set()).add(tool_call_id(item))
+                value = arguments_dict["thought"]
+
+                # Increment tool count and thinking count, keeping the new count as the step number
+                current_count = state.get("tool_count", 0) + 1
+                state["tool_count"] = current_count
+                state["thinking_count"] = state.get("thinking_count", 0) + 1
+
+                # Update the agent step with the thought
+                agent_step = state.get("agent_step")
+                if agent_step is not None:
+                    # Update the step content
+                    step_text = f"**Step {current_count}: Thinking**\n{value}"
+                    agent_step.output = f"{agent_step.output}\n\n{step_text}" if agent_step.output else step_text
+
+                    # Update the step name to flow naturally after "Using"/"Used" prefix
+                    agent_step.name = f"thinking to analyze the request"
+                    await self._update_agent_step(state)
+            else:
+                # Get the tool name
+                tool_name = getattr(item.raw_item, 'name', "tool")
+
+                # Format the input as a string
+                input_str = json_dumps_pretty(arguments_dict)
+
+                # Increment tool count, keeping the new count as the step number
+                current_count = state.get("tool_count", 0) + 1
+                state["tool_count"] = current_count
+                # Parallel calls are all made before any of their outputs arrive, so each
+                # pending call is kept by its call ID until its output is recorded
+                state.setdefault("pending_tools", {})[tool_call_id(item)] = tool_name
+
+                # Update the agent step with the tool call
+                agent_step = state.get("agent_step")
+                if agent_step is not None:
+                    # Update the step content
+                    step_text = f"**Step {current_count}: {tool_name}**\n```json\n{input_str}\n```"
+                    agent_step.output = f"{agent_step.output}\n\n{step_text}" if agent_step.output else step_text
+
+                    # Update the step name to flow naturally after "Using"/"Used" prefix
+                    agent_step.name = f"{tool_name} to process the request"
+                    await self._update_agent_step(state)
+        except Exception as e:
+            error_text = f"Error parsing tool call: {e}"
+            await assistant_msg.stream_token(f"\n<error>{error_text}</error>")
+            logger.error(f"Error processing tool call: {e}")
+
+    async def _handle_tool_output(self, item, state, assistant_msg):
+        """Record a tool's output on the agent step, skipping the output of thoughts."""
+        call_id = tool_call_id(item)
+        if state and call_id in state.get("thought_calls", ()):
+            state["thought_calls"].discard(call_id)
+            return  # Skip processing thought outputs
+
+        try:
+            # Try to parse output as JSON, but only when it looks like an object or array
+            output_content = item.output
+            if output_content[:1] in ("{", "["):
+                try:
+                    output_json = json_loads(output_content)
+                    # Only pretty-print the whole payload when there is no text field
+                    output_content = output_json.get('text') if isinstance(output_json, dict) else None
+                    if output_content is None:
+                        output_content = json_dumps_pretty(output_json)
+                except json.JSONDecodeError:
+                    output_content = item.output
+
+            # Update the agent step with the tool output
+            agent_step = state.get("agent_step") if state else None
+            pending_tools = state.get("pending_tools", {}) if state else {}
+            if agent_step is not None and call_id in pending_tools:
+                current_tool = pending_tools.pop(call_id)
+
+                # Add the tool output to the existing output with more context
+                agent_step.output += f"\n\n**Output from {current_tool}:**\n```\n{str(output_content)}\n```"
+
+                # Update the step name to flow naturally after "Using"/"Used" prefix
+                agent_step.name = f"{current_tool} to process the result"
+
+                # Update the step
+                await self._update_agent_step(state)
+            else:
+                # If we don't have a step, fall back to the old behavior
+                full_output = f"\n<tool_output>\n{str(output_content)}\n</tool_output>\n"
+
+                # For tool outputs, update the message directly
+                if hasattr(assistant_msg, 'original_message'):
+                    assistant_msg.original_message.content += full_output
+                    await assistant_msg.original_message.update()
+                else:
+                    assistant_msg.content += full_output
+                    await assistant_msg.update()
+        except Exception as e:
+            logger.error(f"Error processing tool output: {e}")
+            await assistant_msg.stream_token(f"\n<error>Error processing tool output: {e}</error>")
+
+    async def _handle_message_output(self, item, state, assistant_msg):
+        """Accumulate the final assistant message text."""
+        if item.raw_item.role == "assistant" and state and "assistant_reply" in state:
+            state["assistant_reply"].append(assistant_message_text(item))
+
+    # Run item handlers keyed by item type, looked up once per event in handle_event
+    _ITEM_HANDLERS = {
+        "tool_call_item": _handle_tool_call,
+        "tool_call_output_item": _handle_tool_output,
+        "message_output_item": _handle_message_output,
+    }
\ No newline at end of file
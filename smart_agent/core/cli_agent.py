@@ -16,7 +16,7 @@ from typing import List, Dict, Any, Optional
 from contextlib import AsyncExitStack
 
 # Import agent components
-from agents import Agent, OpenAIChatCompletionsModel, Runner, ItemHelpers
+from agents import Agent, OpenAIChatCompletionsModel, Runner
 from openai.types.responses import ResponseTextDeltaEvent
 
 # Set up logging
@@ -24,13 +24,45 @@ logger = logging.getLogger(__name__)
 
 # Rich imports for CLI formatting
 from rich.console import Console
+from rich.text import Text
 
 # Import base SmartAgent
-from .agent import BaseSmartAgent
+from .agent import (
+    AGENT_MODEL_SETTINGS,
+    BaseSmartAgent,
+    assistant_message_text,
+    describe_connection_error,
+    json_dumps_pretty,
+    json_loads,
+    tool_call_arguments,
+    tool_call_id,
+)
 
 # Initialize console for rich output
 console = Console()
 
+# Constants for consistent streaming output, built once rather than per query
+OUTPUT_INTERVAL = 0.05  # 50ms between outputs
+OUTPUT_SIZE = 12  # Output characters at a time
+# Most characters allowed to queue up behind the display; anything beyond this is printed
+# with the next batch, so the paced output never falls far behind a fast model
+OUTPUT_MAX_BACKLOG = 240
+
+# Per-server timeout (in seconds) for connecting to an MCP server
+MCP_CONNECTION_TIMEOUT = 10.0
+
+# Chat loop commands, which are handled locally and kept out of the readline history
+CHAT_COMMANDS = frozenset({"exit", "quit", "clear"})
+
+# Colors for different content types
+TYPE_COLORS = {
+    "assistant": "green",
+    "thought": "cyan",
+    "tool_output": "bright_green",
+    "tool": "yellow",
+    "error": "red"
+}
+
 
 class CLISmartAgent(BaseSmartAgent):
     """
@@ -65,72 +97,65 @@ class CLISmartAgent(BaseSmartAgent):
         # Create a buffer for tokens with type information
         buffer = deque()
         stream_ended = asyncio.Event()
-        
-        # Define constants for consistent output
-        output_interval = 0.05  # 50ms between outputs
-        output_size = 12  # Output characters at a time
-        
-        # Define colors for different content types
-        type_colors = {
-            "assistant": "green",
-            "thought": "cyan",
-            "tool_output": "bright_green",
-            "tool": "yellow",
-            "error": "red"
-        }
+        # Set whenever text is buffered or the stream ends, so an idle streaming task
+        # sleeps until there is something to do instead of polling the buffer
+        tokens_available = asyncio.Event()
+        # Notified by the streaming task whenever it empties the buffer, so tool output
+        # can wait for pending text to be printed without restarting the task
+        buffer_drained = asyncio.Condition()
+        # Number of characters currently buffered
+        buffered_chars = 0
         
         # Function to add content to buffer with type information
         def add_to_buffer(content, content_type="assistant"):
-            # Add special marker for type change
-            if buffer and buffer[-1][1] != content_type:
-                buffer.append(("TYPE_CHANGE", content_type))
-            
-            # Add each character with its type
-            for char in content:
-                buffer.append((char, content_type))
+            nonlocal buffered_chars
+            # Buffer whole segments rather than one tuple per character; the
+            # streaming task slices them into fixed-size batches as it prints
+            if content:
+                buffer.append((content, content_type))
+                buffered_chars += len(content)
+                tokens_available.set()
         
         # Function to stream output at a consistent rate with different colors
         async def stream_output(buffer, interval, size, end_event):
-            current_batch_type = "assistant"
+            nonlocal buffered_chars
             try:
                 while not end_event.is_set() or buffer:  # Continue until signaled and buffer is empty
-                    if buffer:
-                        # Get a batch of tokens from the buffer
-                        batch = []
+                    if not buffer:
+                        tokens_available.clear()
+                        if not end_event.is_set():
+                            await tokens_available.wait()
+                        continue
+                    
+                    # Print a regular batch, or catch up on any backlog beyond the limit
+                    remaining = max(size, buffered_chars - OUTPUT_MAX_BACKLOG)
+                    buffered_chars -= min(remaining, buffered_chars)
+                    while buffer and remaining > 0:
+                        content, content_type = buffer[0]
                         
-                        for _ in range(min(size, len(buffer))):
-                            if not buffer:
-                                break
-                                
-                            item = buffer.popleft()
-                            
-                            # Handle type change marker
-                            if item[0] == "TYPE_CHANGE":
-                                if batch:  # Print current batch before changing type
-                                    rich_console.print(''.join(batch), end="", style=type_colors.get(current_batch_type, "green"))
-                                    batch = []
-                                current_batch_type = item[1]
-                                continue
-                            
-                            # If type changes within batch, print current batch and start new one
-                            if item[1] != current_batch_type:
-                                rich_console.print(''.join(batch), end="", style=type_colors.get(current_batch_type, "green"))
-                                batch = [item[0]]
-                                current_batch_type = item[1]
-                            else:
-                                batch.append(item[0])
+                        # Take up to the remaining batch size from the head segment
+                        chunk = content[:remaining]
+                        if len(chunk) < len(content):
+                            buffer[0] = (content[remaining:], content_type)
+                        else:
+                            buffer.popleft()
+                        remaining -= len(chunk)
                         
-                        # Print any remaining batch content
-                        if batch:
-                            rich_console.print(''.join(batch), end="", style=type_colors.get(current_batch_type, "green"))
+                        # Each segment carries its own type, so type changes need no marker
+                        rich_console.print(chunk, end="", style=TYPE_COLORS.get(content_type, "green"))
+                    
+                    # Wake anyone waiting for the pending text to finish printing
+                    if not buffer:
+                        async with buffer_drained:
+                            buffer_drained.notify_all()
                     
                     await asyncio.sleep(interval)
             except asyncio.CancelledError:
                 # Task cancellation is expected on completion
                 pass
         
-        # Track the assistant's response
-        assistant_reply = ""
+        # Track the assistant's response as parts, joined once when the run completes
+        assistant_parts = []
         
         # Ensure we have an agent
         if agent is None:
@@ -141,35 +166,43 @@ class CLISmartAgent(BaseSmartAgent):
         
         # Start the streaming task
         streaming_task = asyncio.create_task(
-            stream_output(buffer, output_interval, output_size, stream_ended)
+            stream_output(buffer, OUTPUT_INTERVAL, OUTPUT_SIZE, stream_ended)
         )
         
         try:
             # Run the agent with streaming
             result = Runner.run_streamed(agent, history, max_turns=100)
-            is_thought = False
+            # Call IDs of pending thought calls; with parallel tool calls the outputs of a turn
+            # only follow all of its calls, so a single flag can't tell them apart
+            thought_calls = set()
             
             # Process the stream events
             async for event in result.stream_events():
+                # Bind the event and item fields once instead of re-resolving them per branch
+                event_type = event.type
+
                 # Handle token streaming
-                if event.type == "raw_response_event" and isinstance(event.data, ResponseTextDeltaEvent):
+                if event_type == "raw_response_event" and isinstance(event.data, ResponseTextDeltaEvent):
                     add_to_buffer(event.data.delta, "assistant")
                     continue
-                elif event.type == "agent_updated_stream_event":
+                elif event_type == "agent_updated_stream_event":
                     continue
-                elif event.type == "run_item_stream_event":
+                elif event_type == "run_item_stream_event":
+                    item = event.item
+                    item_type = item.type
+
                     # Handle tool calls
-                    if event.item.type == "tool_call_item":
+                    if item_type == "tool_call_item":
                         try:
-                            arguments_dict = json.loads(event.item.raw_item.arguments)
-                            key, value = next(iter(arguments_dict.items()))
+                            arguments_dict = tool_call_arguments(item)
+                            # Dicts keep insertion order, so the first key is the first argument
+                            key = next(iter(arguments_dict), None)
                             if key == "thought":
-                                is_thought = True
+                                thought_calls.add(tool_call_id(item))
                                 add_to_buffer("\n\n<thought>\n", "thought")
-                                add_to_buffer(str(value), "thought")
+                                add_to_buffer(str(arguments_dict[key]), "thought")
                                 add_to_buffer("\n</thought>\n\n", "thought")
                             else:
-                                is_thought = False
                                 add_to_buffer("\n<tool>\n", "tool")
                                 for arg_key, arg_value in arguments_dict.items():
                                     add_to_buffer(f"{arg_key}={str(arg_value)}\n", "tool")
@@ -179,47 +212,56 @@ class CLISmartAgent(BaseSmartAgent):
                             add_to_buffer(f"\n<error>{error_text}</error>", "error")
                     
                     # Handle tool outputs
-                    elif event.item.type == "tool_call_output_item" and not is_thought:
+                    elif item_type == "tool_call_output_item":
+                        call_id = tool_call_id(item)
+                        if call_id in thought_calls:
+                            # Skip the output of thoughts
+                            thought_calls.discard(call_id)
+                            continue
                         try:
-                            try:
-                                output_json = json.loads(event.item.output)
-                                output_text = output_json.get("text", json.dumps(output_json, indent=2))
-                            except json.JSONDecodeError:
-                                output_text = event.item.output
+                            output_text = item.output
+                            # Only outputs that look like a JSON object or array are worth parsing
+                            if output_text[:1] in ("{", "["):
+                                try:
+                                    output_json = json_loads(output_text)
+                                    # Only pretty-print the whole payload when there is no text field
+                                    output_text = output_json.get("text") if isinstance(output_json, dict) else None
+                                    if output_text is None:
+                                        output_text = json_dumps_pretty(output_json)
+                                except json.JSONDecodeError:
+                                    output_text = item.output
                             
-                            # Pause token streaming
-                            stream_ended.set()
-                            await streaming_task
+                            # Wait for the pending text to be printed before the tool output
+                            async with buffer_drained:
+                                await buffer_drained.wait_for(lambda: not buffer or streaming_task.done())
                             
-                            # Print tool output all at once
-                            rich_console.print("\n<tool_output>\n", end="", style="bright_green bold")
-                            rich_console.print(str(output_text), style="bright_green", end="")
-                            rich_console.print("\n</tool_output>", style="bright_green bold")
+                            # Print tool output all at once, as a single styled write; building the
+                            # Text directly also keeps brackets in the output from being read as markup
+                            rich_console.print(Text.assemble(
+                                ("\n<tool_output>\n", "bright_green bold"),
+                                (str(output_text), "bright_green"),
+                                ("\n</tool_output>", "bright_green bold"),
+                            ))
                             
                             # Ensure output is flushed immediately
                             sys.stdout.flush()
-                            
-                            # Reset for continued streaming
-                            stream_ended.clear()
-                            streaming_task = asyncio.create_task(
-                                stream_output(buffer, output_interval, output_size, stream_ended)
-                            )
                         except Exception as e:
                             add_to_buffer(f"\n<error>Error processing tool output: {e}</error>", "error")
                     
                     # Handle final message
-                    elif event.item.type == "message_output_item" and event.item.raw_item.role == "assistant":
-                        assistant_reply += ItemHelpers.text_message_output(event.item)
+                    elif item_type == "message_output_item" and item.raw_item.role == "assistant":
+                        assistant_parts.append(assistant_message_text(item))
             
             # Signal that the stream has ended
             stream_ended.set()
+            tokens_available.set()
             # Wait for the streaming task to finish processing the buffer
             await streaming_task
             
             # Add a newline after completion
             print()
             
-            return assistant_reply.strip()
+            return "".join(assistant_parts).strip()
         except Exception as e:
             # Log the error and return a user-friendly message
             logger.error(f"Error processing query: {e}")
@@ -227,7 +269,11 @@ class CLISmartAgent(BaseSmartAgent):
         finally:
             # Make sure the streaming task is properly cleaned up
             if not stream_ended.is_set():
+                # The run failed or was cancelled, so drop the pending text instead of
+                # pacing out the whole backlog before returning
+                buffer.clear()
                 stream_ended.set()
+                tokens_available.set()
                 try:
                     await streaming_task
                 except Exception:
@@ -264,23 +310,36 @@ class CLISmartAgent(BaseSmartAgent):
         # Set up MCP servers
         # self.mcp_servers = self.setup_mcp_servers()
         
+        # MCP servers connected for this chat session, by name, shared by every query; each
+        # is entered on its own exit stack so a dropped connection can be closed on its own
+        connected_servers = {}
+        
+        async def close_connected_servers():
+            # Close the servers still pooled when the chat ends, newest first
+            for server_stack in reversed([server_stack for _, server_stack in connected_servers.values()]):
+                await server_stack.aclose()
+            connected_servers.clear()
+        
         # Chat loop
         async with AsyncExitStack() as exit_stack:
+            exit_stack.push_async_callback(close_connected_servers)
             while True:
                 # Get user input with history support
                 user_input = input("\nYou: ")
+                # Lowercase once; the command checks below all read this
+                command = user_input.lower()
                 
                 # Add non-empty inputs to history
-                if user_input.strip() and user_input.lower() not in ["exit", "quit", "clear"]:
+                if user_input.strip() and command not in CHAT_COMMANDS:
                     readline.add_history(user_input)
                 
                 # Check for exit command
-                if user_input.lower() in ["exit", "quit"]:
+                if command in ("exit", "quit"):
                     print("Exiting chat...")
                     break
                 
                 # Check for clear command
-                if user_input.lower() == "clear":
+                if command == "clear":
                     # Reset the conversation history
                     self.conversation_history = [{"role": "system", "content": self.system_prompt}]
                     print("Conversation history cleared")
@@ -294,13 +353,41 @@ class CLISmartAgent(BaseSmartAgent):
                 self.conversation_history.append({"role": "user", "content": user_input})
                 
                 try:
-                    # Set up MCP servers for this query
-                    mcp_servers = []
-                    for server in self.mcp_servers:
-                        # Enter the server as an async context manager
-                        connected_server = await exit_stack.enter_async_context(server)
-                        mcp_servers.append(connected_server)
-                        logger.debug(f"Connected to MCP server: {connected_server.name}")
+                    # Drop pooled servers whose connection has gone away (a crashed stdio tool or
+                    # a dropped HTTP session), so they are connected again below
+                    for name, (server, server_stack) in list(connected_servers.items()):
+                        if not server.client.is_connected():
+                            logger.info(f"Reconnecting to dropped MCP server: {name}")
+                            del connected_servers[name]
+                            try:
+                                await asyncio.wait_for(server_stack.aclose(), timeout=5.0)
+                            except (asyncio.TimeoutError, Exception) as e:
+                                logger.debug(f"Timeout or error closing dropped MCP server {name}: {e}")
+                    
+                    # Connect the MCP servers that aren't connected yet, all at once; connections
+                    # stay open until the session ends, so later queries skip the handshakes
+                    pending = [server for server in self.mcp_servers if server.name not in connected_servers]
+                    if pending:
+                        # A failed attempt leaves nothing on its stack, so only the stacks of
+                        # connected servers are kept, to be closed with the session
+                        server_stacks = [AsyncExitStack() for _ in pending]
+                        results = await asyncio.gather(
+                            *(asyncio.wait_for(server_stack.enter_async_context(server), timeout=MCP_CONNECTION_TIMEOUT)
+                              for server, server_stack in zip(pending, server_stacks)),
+                            return_exceptions=True,
+                        )
+                        for server, server_stack, result in zip(pending, server_stacks, results):
+                            if isinstance(result, asyncio.CancelledError):
+                                raise result
+                            if isinstance(result, BaseException):
+                                # Carry on without this server; it is retried on the next query
+                                error = "timed out" if isinstance(result, asyncio.TimeoutError) else describe_connection_error(result)
+                                logger.error(f"Error connecting to MCP server {server.name}: {error}")
+                                print(f"\nWarning: could not connect to MCP server {server.name}: {error}")
+                            else:
+                                connected_servers[server.name] = (result, server_stack)
+                                logger.debug("Connected to MCP server: %s", server.name)
+                    mcp_servers = [connected_servers[server.name][0] for server in self.mcp_servers if server.name in connected_servers]
                     
                     # Create a fresh agent for each query
                     agent = Agent(
@@ -316,6 +403,7 @@ class CLISmartAgent(BaseSmartAgent):
                             openai_client=self.openai_client,
                         ),
                         mcp_servers=mcp_servers,
+                        model_settings=AGENT_MODEL_SETTINGS,
                     )
                     # print(agent.model_settings.to_json_dict(), flush=True)
                     # agent.model_settings.max_tokens = 10000
@@ -6,23 +6,53 @@ It includes new implementations of MCPServerSse and MCPServerStdio that use the
 """
 
 import asyncio
+import importlib.util
 import logging
 import os
+import time
 from typing import Any, Dict, List, Optional
 from contextlib import AsyncExitStack
 from pathlib import Path
 
+import httpx
 from agents.mcp import MCPServer
 from mcp.types import CallToolResult, Tool as MCPTool
 from agents.exceptions import UserError
 
 # Import fastmcp Client
 from fastmcp.client import Client
+from fastmcp.client.transports import SSETransport, StreamableHttpTransport
 import datetime
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
+# A server that answered a request within this many seconds is considered alive without pinging it
+PING_ACTIVITY_WINDOW = 5.0
+
+# HTTP/2 needs the h2 package from the http2 extra; without it httpx can only speak HTTP/1.1.
+# httpx imports h2 itself, so only check that it is installed
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+
+def _http2_client_factory(headers=None, timeout=None, auth=None, **kwargs) -> httpx.AsyncClient:
+    """Create an httpx client that multiplexes MCP requests over one HTTP/2 connection.
+
+    HTTP/2 is negotiated via ALPN, so plain-HTTP servers and servers that don't
+    support it transparently fall back to HTTP/1.1.
+    """
+    return httpx.AsyncClient(
+        http2=True,
+        headers=headers,
+        # Match the MCP defaults used when no factory is given
+        timeout=timeout or httpx.Timeout(30.0, read=300.0),
+        auth=auth,
+        follow_redirects=kwargs.get("follow_redirects", True),
+        # A single HTTP/2 connection carries every stream, so there is no need for a larger pool
+        limits=httpx.Limits(max_keepalive_connections=1, keepalive_expiry=60),
+    )
+
+
 class MCPServerSse(MCPServer):
     """
     MCP server implementation that uses the HTTP with SSE transport via fastmcp Client.
@@ -60,33 +90,37 @@ class MCPServerSse(MCPServer):
         self._cache_tools_list = cache_tools_list
         self._cache_dirty = True
         self._tools_list = None
+        self._list_tools_future = None
+        self._last_activity: Optional[float] = None
         self.client_session_timeout_seconds = client_session_timeout_seconds
         
         # Create a fastmcp Client with SSE transport
+        # Build the transport explicitly so configured headers and the read timeout reach the
+        # long-lived event stream, instead of letting fastmcp infer a bare transport from the URL
+        transport = SSETransport(
+            url=self.params["url"],
+            headers=self.params.get("headers", {}),
+            sse_read_timeout=self.params.get("sse_read_timeout", 300),
+        )
+        
         self.client = Client(
-            transport=self.params["url"],
+            transport=transport,
             timeout=client_session_timeout_seconds,
         )
-        self._cleanup_lock = asyncio.Lock()
+        self._cleanup_lock: Optional[asyncio.Lock] = None
         self._connected = False
+        self._closed = False
         self.exit_stack = AsyncExitStack()
 
     async def __aenter__(self):
         """Async context manager entry point."""
-        # Connect the client directly without using exit_stack to avoid task context issues
-        await self.client.__aenter__()
-        self.connected_client = self.client
+        # The exit stack owns the client context, so cleanup() unwinds it along with everything else
+        self.connected_client = await self.exit_stack.enter_async_context(self.client)
         await self.connect()
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         """Async context manager exit point."""
-        try:
-            # Properly close the client in the same task context
-            if hasattr(self.client, '__aexit__'):
-                await self.client.__aexit__(exc_type, exc_val, exc_tb)
-        except Exception as e:
-            logger.debug(f"Error during client exit: {e}")
         await self.cleanup()
 
     async def connect(self):
@@ -94,7 +128,11 @@ class MCPServerSse(MCPServer):
         try:
             # The client will be managed by the AsyncExitStack when used as context manager
             self._connected = True
-            logger.info(f"Connected to MCP server: {self._name}")
+            self._closed = False
+            # A new session may expose a different tool set, so refetch on first use
+            self._cache_dirty = True
+            self._last_activity = None
+            logger.info("Connected to MCP server: %s", self._name)
         except Exception as e:
             logger.error(f"Error connecting to MCP server {self._name}: {e}")
             await self.cleanup()
@@ -102,22 +140,27 @@ class MCPServerSse(MCPServer):
 
     async def cleanup(self):
         """Cleanup the server connection."""
+        # Cleanup may be re-entered via __aexit__ when the server was pushed onto its own
+        # exit stack, so bail out early instead of waiting on the (non-reentrant) lock
+        if self._closed:
+            return
+
+        # The lock is only needed once cleanup actually runs, so create it lazily here
+        if self._cleanup_lock is None:
+            self._cleanup_lock = asyncio.Lock()
+
         async with self._cleanup_lock:
+            if self._closed:
+                return
+            self._closed = True
             try:
-                # The client should already be closed by __aexit__, but ensure it's disconnected
-                if hasattr(self.client, '_disconnect') and callable(getattr(self.client, '_disconnect')):
-                    try:
-                        await asyncio.wait_for(self.client._disconnect(), timeout=3.0)
-                    except (asyncio.TimeoutError, Exception) as e:
-                        logger.debug(f"Error during client disconnect for {self._name}: {e}")
-                
-                # Close the exit stack for any other resources (but not the client)
+                # Close the exit stack, which also disconnects the client
                 try:
                     await asyncio.wait_for(self.exit_stack.aclose(), timeout=3.0)
                 except (asyncio.TimeoutError, Exception) as e:
-                    logger.debug(f"Error closing exit stack for {self._name}: {e}")
+                    logger.debug("Error closing exit stack for %s: %s", self._name, e)
                 
-                logger.info(f"Disconnected from MCP server: {self._name}")
+                logger.info("Disconnected from MCP server: %s", self._name)
             except Exception as e:
                 logger.error(f"Error cleaning up server {self._name}: {e}")
             finally:
@@ -141,17 +184,52 @@ class MCPServerSse(MCPServer):
         if self._cache_tools_list and not self._cache_dirty and self._tools_list:
             return self._tools_list
 
+        # Concurrent callers share the in-flight fetch instead of each issuing their own request
+        if self._list_tools_future is not None:
+            return await asyncio.shield(self._list_tools_future)
+
         # Reset the cache dirty to False
         self._cache_dirty = False
+        future = self._list_tools_future = asyncio.get_running_loop().create_future()
 
         # Fetch the tools from the server using fastmcp Client
         try:
             # Use the connected client if available, otherwise use the original client
             client_to_use = getattr(self, 'connected_client', self.client)
             self._tools_list = await client_to_use.list_tools()
+            self._last_activity = time.monotonic()
+            future.set_result(self._tools_list)
             return self._tools_list
         except Exception as e:
             logger.error(f"Error listing tools from server {self._name}: {e}")
+            future.set_exception(e)
+            # Mark the exception as retrieved in case nobody else was waiting on it
+            future.exception()
+            raise
+        finally:
+            # Release any waiters if the fetch itself was cancelled
+            if not future.done():
+                future.cancel()
+            self._list_tools_future = None
+
+    async def ping(self) -> bool:
+        """Send a lightweight MCP ping to check that the server is alive."""
+        if not self._connected:
+            raise UserError(f"Server {self._name} not initialized. Make sure you call `connect()` first.")
+
+        # Any recent response already proves the server is alive, so skip the round-trip
+        if self._last_activity is not None and time.monotonic() - self._last_activity < PING_ACTIVITY_WINDOW:
+            return True
+
+        # A ping is an empty JSON-RPC round-trip, unlike list_tools() which returns the full schema
+        try:
+            client_to_use = getattr(self, 'connected_client', self.client)
+            alive = await client_to_use.ping()
+            if alive:
+                self._last_activity = time.monotonic()
+            return alive
+        except Exception as e:
+            logger.error(f"Error pinging server {self._name}: {e}")
             raise
 
     async def call_tool(self, tool_name: str, arguments: Dict[str, Any] = None) -> CallToolResult:
@@ -164,6 +242,7 @@ class MCPServerSse(MCPServer):
             # Use the connected client if available, otherwise use the original client
             client_to_use = getattr(self, 'connected_client', self.client)
             result = await client_to_use.call_tool_mcp(tool_name, arguments or {})
+            self._last_activity = time.monotonic()
             return result
         except Exception as e:
             logger.error(f"Error calling tool {tool_name} on server {self._name}: {e}")
@@ -221,6 +300,8 @@ class MCPServerStdio(MCPServer):
         self._cache_tools_list = cache_tools_list
         self._cache_dirty = True
         self._tools_list = None
+        self._list_tools_future = None
+        self._last_activity: Optional[float] = None
         self.client_session_timeout_seconds = client_session_timeout_seconds
         
         # Create a fastmcp Client with stdio transport
@@ -240,26 +321,20 @@ class MCPServerStdio(MCPServer):
             transport=transport_dict,
             timeout=client_session_timeout_seconds,
         )
-        self._cleanup_lock = asyncio.Lock()
+        self._cleanup_lock: Optional[asyncio.Lock] = None
         self._connected = False
+        self._closed = False
         self.exit_stack = AsyncExitStack()
 
     async def __aenter__(self):
         """Async context manager entry point."""
-        # Connect the client directly without using exit_stack to avoid task context issues
-        await self.client.__aenter__()
-        self.connected_client = self.client
+        # The exit stack owns the client context, so cleanup() unwinds it along with everything else
+        self.connected_client = await self.exit_stack.enter_async_context(self.client)
         await self.connect()
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         """Async context manager exit point."""
-        try:
-            # Properly close the client in the same task context
-            if hasattr(self.client, '__aexit__'):
-                await self.client.__aexit__(exc_type, exc_val, exc_tb)
-        except Exception as e:
-            logger.debug(f"Error during client exit: {e}")
         await self.cleanup()
 
     async def connect(self):
@@ -267,7 +342,11 @@ class MCPServerStdio(MCPServer):
         try:
             # The client will be managed by the AsyncExitStack when used as context manager
             self._connected = True
-            logger.info(f"Connected to MCP server: {self._name}")
+            self._closed = False
+            # A new session may expose a different tool set, so refetch on first use
+            self._cache_dirty = True
+            self._last_activity = None
+            logger.info("Connected to MCP server: %s", self._name)
         except Exception as e:
             logger.error(f"Error connecting to MCP server {self._name}: {e}")
             await self.cleanup()
@@ -275,18 +354,23 @@ class MCPServerStdio(MCPServer):
 
     async def cleanup(self):
         """Cleanup the server connection."""
+        # Cleanup may be re-entered via __aexit__ when the server was pushed onto its own
+        # exit stack, so bail out early instead of waiting on the (non-reentrant) lock
+        if self._closed:
+            return
+
+        # The lock is only needed once cleanup actually runs, so create it lazily here
+        if self._cleanup_lock is None:
+            self._cleanup_lock = asyncio.Lock()
+
         async with self._cleanup_lock:
+            if self._closed:
+                return
+            self._closed = True
             try:
-                # The client should already be closed by __aexit__, but ensure it's disconnected
-                if hasattr(self.client, '_disconnect') and callable(getattr(self.client, '_disconnect')):
-                    try:
-                        await asyncio.wait_for(self.client._disconnect(), timeout=3.0)
-                    except (asyncio.TimeoutError, Exception) as e:
-                        logger.debug(f"Error during client disconnect for {self._name}: {e}")
-                
-                # Close the exit stack for any other resources (but not the client)
+                # Close the exit stack, which also disconnects the client
                 await self.exit_stack.aclose()
-                logger.info(f"Disconnected from MCP server: {self._name}")
+                logger.info("Disconnected from MCP server: %s", self._name)
             except Exception as e:
                 logger.error(f"Error cleaning up server {self._name}: {e}")
             finally:
@@ -310,17 +394,52 @@ class MCPServerStdio(MCPServer):
         if self._cache_tools_list and not self._cache_dirty and self._tools_list:
             return self._tools_list
 
+        # Concurrent callers share the in-flight fetch instead of each issuing their own request
+        if self._list_tools_future is not None:
+            return await asyncio.shield(self._list_tools_future)
+
         # Reset the cache dirty to False
         self._cache_dirty = False
+        future = self._list_tools_future = asyncio.get_running_loop().create_future()
 
         # Fetch the tools from the server using fastmcp Client
         try:
             # Use the connected client if available, otherwise use the original client
             client_to_use = getattr(self, 'connected_client', self.client)
             self._tools_list = await client_to_use.list_tools()
+            self._last_activity = time.monotonic()
+            future.set_result(self._tools_list)
             return self._tools_list
         except Exception as e:
             logger.error(f"Error listing tools from server {self._name}: {e}")
+            future.set_exception(e)
+            # Mark the exception as retrieved in case nobody else was waiting on it
+            future.exception()
+            raise
+        finally:
+            # Release any waiters if the fetch itself was cancelled
+            if not future.done():
+                future.cancel()
+            self._list_tools_future = None
+
+    async def ping(self) -> bool:
+        """Send a lightweight MCP ping to check that the server is alive."""
+        if not self._connected:
+            raise UserError(f"Server {self._name} not initialized. Make sure you call `connect()` first.")
+
+        # Any recent response already proves the server is alive, so skip the round-trip
+        if self._last_activity is not None and time.monotonic() - self._last_activity < PING_ACTIVITY_WINDOW:
+            return True
+
+        # A ping is an empty JSON-RPC round-trip, unlike list_tools() which returns the full schema
+        try:
+            client_to_use = getattr(self, 'connected_client', self.client)
+            alive = await client_to_use.ping()
+            if alive:
+                self._last_activity = time.monotonic()
+            return alive
+        except Exception as e:
+            logger.error(f"Error pinging server {self._name}: {e}")
             raise
 
     async def call_tool(self, tool_name: str, arguments: Dict[str, Any] = None) -> CallToolResult:
@@ -333,6 +452,7 @@ class MCPServerStdio(MCPServer):
             # Use the connected client if available, otherwise use the original client
             client_to_use = getattr(self, 'connected_client', self.client)
             result = await client_to_use.call_tool_mcp(tool_name, arguments or {})
+            self._last_activity = time.monotonic()
             return result
         except Exception as e:
             logger.error(f"Error calling tool {tool_name} on server {self._name}: {e}")
@@ -377,48 +497,47 @@ class MCPServerStreamableHttp(MCPServer):
         self._cache_tools_list = cache_tools_list
         self._cache_dirty = True
         self._tools_list = None
+        self._list_tools_future = None
+        self._last_activity: Optional[float] = None
         self.client_session_timeout_seconds = client_session_timeout_seconds
         
         # Create a fastmcp Client with StreamableHttp transport
-        from fastmcp.client.transports import StreamableHttpTransport
-        
         # Extract configuration parameters
         url = self.params["url"]
         headers = self.params.get("headers", {})
         timeout = self.params.get("timeout", 30)
         sse_read_timeout = self.params.get("sse_read_timeout", 300)
+        http2 = self.params.get("http2", True)
+        if http2 and not HTTP2_AVAILABLE:
+            logger.debug("h2 is not installed, using HTTP/1.1 for %s", self._name)
+            http2 = False
         
         # Create the transport
         transport = StreamableHttpTransport(
             url=url,
             headers=headers,
             sse_read_timeout=sse_read_timeout,
+            httpx_client_factory=_http2_client_factory if http2 else None,
         )
         
         self.client = Client(
             transport=transport,
             timeout=client_session_timeout_seconds,
         )
-        self._cleanup_lock = asyncio.Lock()
+        self._cleanup_lock: Optional[asyncio.Lock] = None
         self._connected = False
+        self._closed = False
         self.exit_stack = AsyncExitStack()
 
     async def __aenter__(self):
         """Async context manager entry point."""
-        # Connect the client directly without using exit_stack to avoid task context issues
-        await self.client.__aenter__()
-        self.connected_client = self.client
+        # The exit stack owns the client context, so cleanup() unwinds it along with everything else
+        self.connected_client = await self.exit_stack.enter_async_context(self.client)
         await self.connect()
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         """Async context manager exit point."""
-        try:
-            # Properly close the client in the same task context
-            if hasattr(self.client, '__aexit__'):
-                await self.client.__aexit__(exc_type, exc_val, exc_tb)
-        except Exception as e:
-            logger.debug(f"Error during client exit: {e}")
         await self.cleanup()
 
     async def connect(self):
@@ -426,7 +545,11 @@ class MCPServerStreamableHttp(MCPServer):
         try:
             # The client will be managed by the AsyncExitStack when used as context manager
             self._connected = True
-            logger.info(f"Connected to MCP server: {self._name}")
+            self._closed = False
+            # A new session may expose a different tool set, so refetch on first use
+            self._cache_dirty = True
+            self._last_activity = None
+            logger.info("Connected to MCP server: %s", self._name)
         except Exception as e:
             logger.error(f"Error connecting to MCP server {self._name}: {e}")
             await self.cleanup()
@@ -434,18 +557,23 @@ class MCPServerStreamableHttp(MCPServer):
 
     async def cleanup(self):
         """Cleanup the server connection."""
+        # Cleanup may be re-entered via __aexit__ when the server was pushed onto its own
+        # exit stack, so bail out early instead of waiting on the (non-reentrant) lock
+        if self._closed:
+            return
+
+        # The lock is only needed once cleanup actually runs, so create it lazily here
+        if self._cleanup_lock is None:
+            self._cleanup_lock = asyncio.Lock()
+
         async with self._cleanup_lock:
+            if self._closed:
+                return
+            self._closed = True
             try:
-                # First try to gracefully close the client if it has a close method
-                if hasattr(self.client, '_disconnect') and callable(getattr(self.client, '_disconnect')):
-                    try:
-                        await asyncio.wait_for(self.client._disconnect(), timeout=3.0)
-                    except (asyncio.TimeoutError, Exception) as e:
-                        logger.debug(f"Error during client disconnect for {self._name}: {e}")
-                
-                # Then close the exit stack
+                # Close the exit stack, which also disconnects the client
                 await self.exit_stack.aclose()
-                logger.info(f"Disconnected from MCP server: {self._name}")
+                logger.info("Disconnected from MCP server: %s", self._name)
             except Exception as e:
                 logger.error(f"Error cleaning up server {self._name}: {e}")
             finally:
@@ -469,17 +597,52 @@ class MCPServerStreamableHttp(MCPServer):
         if self._cache_tools_list and not self._cache_dirty and self._tools_list:
             return self._tools_list
 
+        # Concurrent callers share the in-flight fetch instead of each issuing their own request
+        if self._list_tools_future is not None:
+            return await asyncio.shield(self._list_tools_future)
+
         # Reset the cache dirty to False
         self._cache_dirty = False
+        future = self._list_tools_future = asyncio.get_running_loop().create_future()
 
         # Fetch the tools from the server using fastmcp Client
         try:
             # Use the connected client if available, otherwise use the original client
             client_to_use = getattr(self, 'connected_client', self.client)
             self._tools_list = await client_to_use.list_tools()
+            self._last_activity = time.monotonic()
+            future.set_result(self._tools_list)
             return self._tools_list
         except Exception as e:
             logger.error(f"Error listing tools from server {self._name}: {e}")
+            future.set_exception(e)
+            # Mark the exception as retrieved in case nobody else was waiting on it
+            future.exception()
+            raise
+        finally:
+            # Release any waiters if the fetch itself was cancelled
+            if not future.done():
+                future.cancel()
+            self._list_tools_future = None
+
+    async def ping(self) -> bool:
+        """Send a lightweight MCP ping to check that the server is alive."""
+        if not self._connected:
+            raise UserError(f"Server {self._name} not initialized. Make sure you call `connect()` first.")
+
+        # Any recent response already proves the server is alive, so skip the round-trip
+        if self._last_activity is not None and time.monotonic() - self._last_activity < PING_ACTIVITY_WINDOW:
+            return True
+
+        # A ping is an empty JSON-RPC round-trip, unlike list_tools() which returns the full schema
+        try:
+            client_to_use = getattr(self, 'connected_client', self.client)
+            alive = await client_to_use.ping()
+            if alive:
+                self._last_activity = time.monotonic()
+            return alive
+        except Exception as e:
+            logger.error(f"Error pinging server {self._name}: {e}")
             raise
 
     async def call_tool(self, tool_name: str, arguments: Dict[str, Any] = None) -> CallToolResult:
@@ -492,6 +655,7 @@ class MCPServerStreamableHttp(MCPServer):
             # Use the connected client if available, otherwise use the original client
             client_to_use = getattr(self, 'connected_client', self.client)
             result = await client_to_use.call_tool_mcp(tool_name, arguments or {})
+            self._last_activity = time.monotonic()
             return result
         except Exception as e:
             logger.error(f"Error calling tool {tool_name} on server {self._name}: {e}")
@@ -30,7 +30,8 @@ class SmoothStreamWrapper:
         original_message,
         batch_size: int = 20,
         flush_interval: float = 0.05,
-        debug: bool = False
+        debug: bool = False,
+        max_buffer_size: int = 2000
     ):
         """
         Initialize the SmoothStreamWrapper.
@@ -40,21 +41,38 @@ class SmoothStreamWrapper:
             batch_size: Number of tokens to batch before sending
             flush_interval: Time in seconds between flushes
             debug: Whether to log debug information
+            max_buffer_size: Maximum number of tokens allowed to queue up behind the
+                display; anything beyond this is flushed with the next batch so the UI
+                never falls arbitrarily far behind a fast model
         """
         self.original_message = original_message
         self.batch_size = batch_size
         self.flush_interval = flush_interval
         self.debug = debug
+        self.max_buffer_size = max_buffer_size
         
         # Batching state
         self.token_buffer = deque()
         self.stream_ended = asyncio.Event()
+        self.tokens_available = asyncio.Event()
         self.streaming_task = None
         self.total_tokens = 0
         self.batch_count = 0
         
-        # Forward content attribute to original message
+        # Track the streamed content as parts, joined only when it is read; appending
+        # every token to one string would make long messages quadratic to build
         self.content = self.original_message.content
+
+    @property
+    def content(self) -> str:
+        """The full content streamed so far."""
+        content = "".join(self._content_parts)
+        self._content_parts = [content]
+        return content
+
+    @content.setter
+    def content(self, value: str):
+        self._content_parts = [value]
         
     async def stream_token(self, token: str, is_sequence: bool = False):
         """
@@ -79,10 +97,12 @@ class SmoothStreamWrapper:
             self.content = token
             return
             
-        # Add token to buffer
-        self.token_buffer.extend(token)
+        # Add token to buffer and wake the streaming task if it is idle; tokens are kept
+        # whole, so batches are counted in tokens and flushing joins far fewer pieces
+        self.token_buffer.append(token)
+        self.tokens_available.set()
         # Update our content tracking
-        self.content += token
+        self._content_parts.append(token)
         
         # Start the streaming task if not already running
         if not self.streaming_task or self.streaming_task.done():
@@ -92,11 +112,12 @@ class SmoothStreamWrapper:
                     self.token_buffer,
                     self.flush_interval,
                     self.batch_size,
-                    self.stream_ended
+                    self.stream_ended,
+                    self.tokens_available
                 )
             )
             
-    async def _stream_output_task(self, msg, buffer, interval, size, end_event):
+    async def _stream_output_task(self, msg, buffer, interval, size, end_event, wake_event):
         """
         Background task to periodically flush the token buffer.
         
@@ -108,6 +129,7 @@ class SmoothStreamWrapper:
             interval: Time in seconds between flushes
             size: Maximum number of tokens to flush at once
             end_event: Event to signal when streaming is complete
+            wake_event: Event set whenever new tokens are buffered or streaming ends
         """
         try:
             # Initialize streaming if needed
@@ -120,8 +142,9 @@ class SmoothStreamWrapper:
             # Continue until signaled and buffer is empty
             while not end_event.is_set() or buffer:
                 if buffer:
-                    # Calculate how many tokens to flush
-                    flush_count = min(size, len(buffer))
+                    # Calculate how many tokens to flush, catching up on any backlog
+                    # beyond max_buffer_size in a single batch
+                    flush_count = min(len(buffer), max(size, len(buffer) - self.max_buffer_size))
                     
                     if flush_count > 0:
                         # Join tokens into a single string
@@ -134,10 +157,15 @@ class SmoothStreamWrapper:
                         self.batch_count += 1
                         
                         if self.debug:
-                            logger.debug(f"Flushed batch #{self.batch_count} with {flush_count} tokens")
-                
-                # Wait before checking again
-                await asyncio.sleep(interval)
+                            logger.debug("Flushed batch #%d with %d tokens", self.batch_count, flush_count)
+
+                    # Wait before flushing the next batch
+                    await asyncio.sleep(interval)
+                else:
+                    # Nothing buffered: sleep until a producer wakes us instead of polling
+                    wake_event.clear()
+                    if not buffer and not end_event.is_set():
+                        await wake_event.wait()
                 
         except asyncio.CancelledError:
             # Task cancellation is expected on completion
@@ -154,6 +182,8 @@ class SmoothStreamWrapper:
             
         except Exception as e:
             logger.error(f"Error in streaming task: {e}")
+            # The message can no longer be streamed to, so release the backlog
+            buffer.clear()
     
     async def _flush_buffer(self):
         """Flush the token buffer to the underlying Message"""
@@ -171,7 +201,7 @@ class SmoothStreamWrapper:
             self.batch_count += 1
             
             if self.debug:
-                logger.debug(f"Manually flushed batch with {buffer_size} tokens")
+                logger.debug("Manually flushed batch with %d tokens", buffer_size)
         except Exception as e:
             logger.error(f"Error flushing token buffer: {e}")
     
@@ -179,6 +209,7 @@ class SmoothStreamWrapper:
         """Send the message, ensuring all buffered tokens are flushed first"""
         # Signal that streaming is complete
         self.stream_ended.set()
+        self.tokens_available.set()
         
         # Wait for the streaming task to finish processing the buffer
         if self.streaming_task and not self.streaming_task.done():
@@ -192,7 +223,7 @@ class SmoothStreamWrapper:
         result = await self.original_message.send()
         
         if self.debug:
-            logger.debug(f"Message sent with {self.total_tokens} total tokens in {self.batch_count} batches")
+            logger.debug("Message sent with %d total tokens in %d batches", self.total_tokens, self.batch_count)
             
         return result
         
@@ -200,6 +231,7 @@ class SmoothStreamWrapper:
         """Update the message, ensuring all buffered tokens are flushed first"""
         # Signal that streaming is complete
         self.stream_ended.set()
+        self.tokens_available.set()
         
         # Wait for the streaming task to finish processing the buffer
         if self.streaming_task and not self.streaming_task.done():
@@ -14,6 +14,10 @@ from typing import Dict, Optional, Tuple
 # Set up logging
 logger = logging.getLogger(__name__)
 
+# Poll interval bounds (in seconds) when waiting for a tool process to exit
+TERMINATION_POLL_INITIAL_INTERVAL = 0.01
+TERMINATION_POLL_MAX_INTERVAL = 0.1
+
 
 class ProcessManager:
     """
@@ -62,6 +66,39 @@ class ProcessManager:
         with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
             return s.connect_ex(('localhost', port)) == 0
 
+    @staticmethod
+    def _wait_for_termination(probe, timeout: float) -> bool:
+        """
+        Wait for a process to exit, polling quickly at first and backing off.
+
+        Most tools exit within a few milliseconds of SIGTERM, so the poll interval starts
+        small and doubles up to TERMINATION_POLL_MAX_INTERVAL instead of always sleeping
+        the full interval before the first re-check.
+
+        Args:
+            probe: Callable that raises ProcessLookupError once the process is gone
+            timeout: Maximum time in seconds to wait
+
+        Returns:
+            True if the process terminated, False if it is still running after the timeout
+        """
+        deadline = time.monotonic() + timeout
+        poll_interval = TERMINATION_POLL_INITIAL_INTERVAL
+        while True:
+            try:
+                probe()
+            except ProcessLookupError:
+                return True
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+
+            # Process still exists, wait a bit
+            time.sleep(min(poll_interval, remaining))
+            if poll_interval < TERMINATION_POLL_MAX_INTERVAL:
+                poll_interval = min(poll_interval * 2, TERMINATION_POLL_MAX_INTERVAL)
+
     def find_available_port(self, start_port: int = 8000, max_attempts: int = 100) -> int:
         """
         Find an available port starting from start_port.
@@ -249,19 +286,10 @@ class ProcessManager:
                             logger.info(f"Sent SIGTERM to process group for {tool_id}")
                             
                             # Wait for the process to terminate gracefully
-                            termination_start = time.time()
-                            process_terminated = False
-                            
-                            while time.time() - termination_start < termination_timeout:
-                                try:
-                                    # Check if process still exists
-                                    os.killpg(os.getpgid(pid), 0)  # Signal 0 just checks if process exists
-                                    # Process still exists, wait a bit
-                                    time.sleep(0.1)
-                                except ProcessLookupError:
-                                    # Process terminated
-                                    process_terminated = True
-                                    break
+                            # (signal 0 just checks if the process group still exists)
+                            process_terminated = self._wait_for_termination(
+                                lambda: os.killpg(os.getpgid(pid), 0), termination_timeout
+                            )
                             
                             # If process is still running after timeout, send SIGKILL
                             if not process_terminated:
@@ -278,19 +306,10 @@ class ProcessManager:
                             logger.info(f"Sent SIGTERM to process {pid} for {tool_id}")
                             
                             # Wait for the process to terminate gracefully
-                            termination_start = time.time()
-                            process_terminated = False
-                            
-                            while time.time() - termination_start < termination_timeout:
-                                try:
-                                    # Check if process still exists
-                                    os.kill(pid, 0)  # Signal 0 just checks if process exists
-                                    # Process still exists, wait a bit
-                                    time.sleep(0.1)
-                                except ProcessLookupError:
-                                    # Process terminated
-                                    process_terminated = True
-                                    break
+                            # (signal 0 just checks if the process still exists)
+                            process_terminated = self._wait_for_termination(
+                                lambda: os.kill(pid, 0), termination_timeout
+                            )
                             
                             # If process is still running after timeout, send SIGKILL
                             if not process_terminated:
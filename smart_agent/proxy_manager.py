@@ -13,6 +13,14 @@ from urllib.parse import urlparse
 # Set up logging
 logger = logging.getLogger(__name__)
 
+# Name of the Docker container that runs the LiteLLM proxy
+LITELLM_CONTAINER_NAME = "smart-agent-litellm-proxy"
+
+# Docker commands used to stop the proxy container, built once at import
+LITELLM_CONTAINER_EXISTS_CMD = ("docker", "ps", "-a", "-q", "-f", f"name={LITELLM_CONTAINER_NAME}")
+LITELLM_CONTAINER_STOP_CMD = ("docker", "stop", LITELLM_CONTAINER_NAME)
+LITELLM_CONTAINER_RM_CMD = ("docker", "rm", LITELLM_CONTAINER_NAME)
+
 
 class ProxyManager:
     """
@@ -62,7 +70,7 @@ class ProxyManager:
             logger.info("Launching LiteLLM proxy using Docker...")
 
         # Check if container already exists and is running
-        container_name = "smart-agent-litellm-proxy"
+        container_name = LITELLM_CONTAINER_NAME
         try:
             result = subprocess.run(
                 ["docker", "ps", "-q", "-f", f"name={container_name}"],
@@ -227,13 +235,13 @@ class ProxyManager:
         else:
             logger.info("Stopping LiteLLM proxy...")
 
-        container_name = "smart-agent-litellm-proxy"
+        container_name = LITELLM_CONTAINER_NAME
         success = False
 
         try:
             # Check if container exists
             result = subprocess.run(
-                ["docker", "ps", "-a", "-q", "-f", f"name={container_name}"],
+                LITELLM_CONTAINER_EXISTS_CMD,
                 stdout=subprocess.PIPE,
                 stderr=subprocess.PIPE,
                 text=True,
@@ -243,7 +251,7 @@ class ProxyManager:
             if result.stdout.strip():
                 # Container exists, try to stop it
                 stop_result = subprocess.run(
-                    ["docker", "stop", container_name],
+                    LITELLM_CONTAINER_STOP_CMD,
                     stdout=subprocess.PIPE,
                     stderr=subprocess.PIPE,
                     text=True,
@@ -258,7 +266,7 @@ class ProxyManager:
 
                     # Also remove the container to ensure a clean restart
                     rm_result = subprocess.run(
-                        ["docker", "rm", container_name],
+                        LITELLM_CONTAINER_RM_CMD,
                         stdout=subprocess.PIPE,
                         stderr=subprocess.PIPE,
                         text=True,
@@ -296,7 +304,7 @@ class ProxyManager:
         if self.debug:
             logger.debug("Checking if LiteLLM proxy is running...")
 
-        container_name = "smart-agent-litellm-proxy"
+        container_name = LITELLM_CONTAINER_NAME
 
         try:
             # Check if container exists and is running
@@ -331,7 +339,7 @@ class ProxyManager:
         if self.debug:
             logger.debug("Getting LiteLLM proxy status...")
 
-        container_name = "smart-agent-litellm-proxy"
+        container_name = LITELLM_CONTAINER_NAME
         status = {
             "running": False,
             "container_id": None,
@@ -3,7 +3,10 @@ Configuration management for Smart Agent.
 Handles loading, configuration, and initialization of tools from YAML configuration.
 """
 
+import copy
+import hashlib
 import os
+import pickle
 import yaml
 import logging
 from typing import Dict, List, Optional, Any
@@ -12,10 +15,102 @@ from pathlib import Path
 # Set up logging
 logger = logging.getLogger(__name__)
 
+# Parse YAML with the libyaml-backed loader when PyYAML was built with it; the pure-Python
+# SafeLoader produces the same data, just several times slower
+try:
+    from yaml import CSafeLoader as _SafeLoader
+except ImportError:
+    from yaml import SafeLoader as _SafeLoader
+
 # Use direct print statements during initialization, then switch to logger
 # This avoids the chicken-and-egg problem of needing to log before we know the log level
 USE_PRINT_DURING_INIT = True
 
+# Root logging setup applied by the last loaded config, as (level, log file)
+_root_logging_setup = None
+
+# Parsed YAML files by absolute path, as ((mtime_ns, size), data); a file is only parsed
+# again once it changes on disk
+_YAML_CACHE = {}
+
+def _load_yaml_cached(path: str) -> Dict:
+    """
+    Load a YAML file, reusing the previous parse while the file is unchanged.
+
+    Args:
+        path: Path to the YAML file
+
+    Returns:
+        The parsed YAML data, as a copy the caller is free to modify
+    """
+    path = os.path.abspath(path)
+    try:
+        stat = os.stat(path)
+        key = (stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        key = None
+
+    cached = _YAML_CACHE.get(path)
+    if key is None or cached is None or cached[0] != key:
+        data = _load_yaml(path)
+        if key is None:
+            return data
+        cached = _YAML_CACHE[path] = (key, data)
+
+    return copy.deepcopy(cached[1])
+
+# Opt-in on-disk cache of parsed config files, so a new process can skip YAML parsing
+CONFIG_CACHE_ENV_VAR = "SMART_AGENT_CONFIG_CACHE"
+CONFIG_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".smart_agent", "cache")
+
+def _load_yaml(path: str) -> Dict:
+    """
+    Parse a YAML file.
+
+    When SMART_AGENT_CONFIG_CACHE=1, the parse is also kept in a pickle file under
+    CONFIG_CACHE_DIR together with a BLAKE2b hash of the file's content, and later
+    processes load that pickle instead while the content is unchanged.
+
+    Args:
+        path: Absolute path to the YAML file
+
+    Returns:
+        The parsed YAML data
+    """
+    # Binary mode hands the bytes straight to the scanner, which detects the encoding itself
+    if os.environ.get(CONFIG_CACHE_ENV_VAR) != "1":
+        # Stream the file into the parser instead of reading it into one bytes object first
+        with open(path, "rb") as f:
+            return yaml.load(f, Loader=_SafeLoader) or {}
+
+    # The cache needs the whole content for its fingerprint
+    with open(path, "rb") as f:
+        content = f.read()
+
+    fingerprint = hashlib.blake2b(content, digest_size=16).hexdigest()
+    path_hash = hashlib.blake2b(path.encode(), digest_size=16).hexdigest()
+    cache_file = os.path.join(CONFIG_CACHE_DIR, f"{path_hash}.pkl")
+    try:
+        with open(cache_file, "rb") as f:
+            cached = pickle.load(f)
+        if cached["fingerprint"] == fingerprint:
+            return cached["data"]
+    except Exception:
+        # Missing, stale-format or unreadable cache files are simply rebuilt
+        pass
+
+    data = yaml.load(content, Loader=_SafeLoader) or {}
+    try:
+        os.makedirs(CONFIG_CACHE_DIR, exist_ok=True)
+        # Write to a temporary file first so a concurrent load never reads a partial pickle
+        temp_file = f"{cache_file}.{os.getpid()}.tmp"
+        with open(temp_file, "wb") as f:
+            pickle.dump({"fingerprint": fingerprint, "data": data}, f, protocol=5)
+        os.replace(temp_file, cache_file)
+    except OSError as e:
+        logger.debug(f"Could not write config cache for {path}: {e}")
+    return data
+
 def update_logger_level(level_str: str):
     """Update the logger level based on the config."""
     log_level = getattr(logging, level_str.upper(), logging.INFO)
@@ -85,8 +180,7 @@ class ConfigManager:
         for path in default_paths:
             if os.path.exists(path):
                 try:
-                    with open(path, "r") as f:
-                        self.config = yaml.safe_load(f) or {}
+                    self.config = _load_yaml_cached(path)
                     log_message(f"Loaded configuration from {path}", "INFO")
 
                     # Load tools configuration directly from config
@@ -98,30 +192,35 @@ class ConfigManager:
                     self.litellm_config = self._load_litellm_config()
                     
                     # Now that we've loaded the config, we can switch to using the logger
-                    global USE_PRINT_DURING_INIT
+                    global USE_PRINT_DURING_INIT, _root_logging_setup
                     USE_PRINT_DURING_INIT = False
                     
                     # Update logger level based on config - do this before any logging
                     log_level = self.get_log_level()
                     update_logger_level(log_level)
                     
-                    # Force reconfiguration of logging
-                    handlers = [logging.StreamHandler()]
-                    log_file = self.get_log_file()
-                    if log_file:
-                        handlers.append(logging.FileHandler(log_file))
-                    
-                    # Reset root logger handlers
-                    for handler in logging.root.handlers[:]:
-                        logging.root.removeHandler(handler)
-                    
-                    # Set up basic config with the correct level
+                    # Reconfigure root logging only when the level or log file changed,
+                    # so loading the config again doesn't reopen the log file
                     numeric_level = getattr(logging, log_level.upper(), logging.INFO)
-                    logging.basicConfig(
-                        level=numeric_level,
-                        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-                        handlers=handlers,
-                    )
+                    log_file = self.get_log_file()
+                    if _root_logging_setup != (numeric_level, log_file):
+                        _root_logging_setup = (numeric_level, log_file)
+                        
+                        handlers = [logging.StreamHandler()]
+                        if log_file:
+                            handlers.append(logging.FileHandler(log_file))
+                        
+                        # Reset root logger handlers, closing them so replaced log files are released
+                        for handler in logging.root.handlers[:]:
+                            logging.root.removeHandler(handler)
+                            handler.close()
+                        
+                        # Set up basic config with the correct level
+                        logging.basicConfig(
+                            level=numeric_level,
+                            format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+                            handlers=handlers,
+                        )
 
                     return
                 except Exception as e:
@@ -152,8 +251,7 @@ class ConfigManager:
             return {}
 
         try:
-            with open(litellm_config_path, "r") as f:
-                return yaml.safe_load(f) or {}
+            return _load_yaml_cached(litellm_config_path)
         except Exception as e:
             log_message(f"Error loading LiteLLM config: {e}", "ERROR")
             return {}
@@ -329,8 +427,9 @@ class ConfigManager:
         """
         servers = []
 
+        # Read the enabled flag from the entry being iterated rather than looking the tool up again
         for tool_id, tool_config in self.tools_config.items():
-            if not self.is_tool_enabled(tool_id):
+            if not tool_config.get("enabled", False):
                 continue
 
             tool_name = tool_config.get("name", tool_id)
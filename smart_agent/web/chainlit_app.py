@@ -12,22 +12,12 @@ import sys
 import json
 import logging
 import asyncio
-import warnings
+import functools
 import argparse
 import signal
 from typing import List, Dict, Any
-from contextlib import AsyncExitStack
 import sys
 
-# Suppress specific warnings that can cause runtime errors
-warnings.filterwarnings("ignore", category=RuntimeWarning, message=".*async generator ignored GeneratorExit.*")
-warnings.filterwarnings("ignore", category=RuntimeWarning, message=".*Attempted to exit cancel scope in a different task.*")
-warnings.filterwarnings("ignore", category=RuntimeWarning, message=".*coroutine.*was never awaited.*")
-
-# Suppress httpcore and anyio related warnings
-warnings.filterwarnings("ignore", module="httpcore.*")
-warnings.filterwarnings("ignore", module="anyio.*")
-
 # Configure asyncio to handle connection cleanup better
 def configure_asyncio():
     """Configure asyncio for better connection handling."""
@@ -80,7 +70,8 @@ signal.signal(signal.SIGINT, signal_handler)
 from smart_agent.web.logging_config import configure_logging
 
 # Configure agents tracing
-from agents import Runner, set_tracing_disabled
+from agents import Agent, OpenAIChatCompletionsModel, set_tracing_disabled
+from openai import AsyncOpenAI
 set_tracing_disabled(disabled=True)
 
 os.environ["GRPC_VERBOSITY"] = "ERROR"
@@ -94,17 +85,11 @@ if "DATABASE_URL" in os.environ:
 
 # Smart Agent imports
 from smart_agent.tool_manager import ConfigManager
-from smart_agent.agent import PromptGenerator
+from smart_agent.core.agent import AGENT_MODEL_SETTINGS, create_openai_client
 from smart_agent.core.chainlit_agent import ChainlitSmartAgent
 from smart_agent.core.smooth_stream import SmoothStreamWrapper
 from smart_agent.web.helpers.setup import create_translation_files
 
-try:
-    from agents import Agent, OpenAIChatCompletionsModel
-except ImportError:
-    Agent = None
-    OpenAIChatCompletionsModel = None
-
 # Chainlit import
 import chainlit as cl
 
@@ -141,12 +126,47 @@ if use_token_batching:
 else:
     logger.info("Token batching disabled")
 
+# Per-server timeout (in seconds) for connecting to an MCP server
+MCP_CONNECTION_TIMEOUT = 10.0
+
+# Whether the translation files have been created in this process; the first chat session
+# creates them, since doing it at import would write .chainlit/ into whatever the cwd is
+_translation_files_created = False
+
+@functools.lru_cache(maxsize=1)
+def _load_config_manager(config_path, config_mtime) -> ConfigManager:
+    """Load the configuration for a given version of the config file."""
+    return ConfigManager(config_path=config_path)
+
+def get_config_manager() -> ConfigManager:
+    """Load the configuration once per version of config.yaml instead of once per chat session.
+
+    Besides parsing the YAML, constructing a ConfigManager resets the root logging
+    handlers, so doing it on every chat start is both slow and disruptive. The cache is
+    keyed by the file's path and modification time, so edits to the file (including
+    settings saved from the UI) are picked up by the next chat session.
+    """
+    config_path = os.path.join(os.getcwd(), "config.yaml")
+    try:
+        config_mtime = os.path.getmtime(config_path)
+    except OSError:
+        config_mtime = None
+    return _load_config_manager(config_path, config_mtime)
+
+@functools.cache
+def get_openai_client(base_url, api_key) -> AsyncOpenAI:
+    """Share one OpenAI client, and so one HTTP connection pool, across chat sessions.
+
+    Keyed by base URL and API key, so changing either in the config gets a new client.
+    """
+    return create_openai_client(base_url, api_key)
+
 @cl.on_settings_update
 async def handle_settings_update(settings):
     """Handle settings updates from the UI."""
     # Make sure config_manager is initialized
     if not hasattr(cl.user_session, 'config_manager') or cl.user_session.config_manager is None:
-        cl.user_session.config_manager = ConfigManager()
+        cl.user_session.config_manager = get_config_manager()
 
     # Update API key and other settings
     cl.user_session.config_manager.set_api_base_url(settings.get("api_base_url", ""))
@@ -164,11 +184,14 @@ async def handle_settings_update(settings):
 @cl.on_chat_start
 async def on_chat_start():
     """Initialize the chat session."""
-    # Create translation files
-    create_translation_files()
+    global _translation_files_created
+    # Create translation files once per process rather than at the start of every session
+    if not _translation_files_created:
+        create_translation_files()
+        _translation_files_created = True
 
-    # Initialize config manager
-    cl.user_session.config_manager = ConfigManager()
+    # Get the shared config manager
+    cl.user_session.config_manager = get_config_manager()
 
     # Get API configuration
     api_key = cl.user_session.config_manager.get_api_key()
@@ -183,11 +206,16 @@ async def on_chat_start():
 
     try:
         # Create the ChainlitSmartAgent
-        smart_agent = ChainlitSmartAgent(config_manager=cl.user_session.config_manager)
+        smart_agent = ChainlitSmartAgent(
+            config_manager=cl.user_session.config_manager,
+            openai_client=get_openai_client(
+                cl.user_session.config_manager.get_api_base_url(),
+                api_key,
+            ),
+        )
                 
-        # Initialize conversation history with system prompt
-        system_prompt = PromptGenerator.create_system_prompt()
-        cl.user_session.conversation_history = [{"role": "system", "content": system_prompt}]
+        # Initialize conversation history with the prompt the agent already generated
+        cl.user_session.conversation_history = [{"role": "system", "content": smart_agent.system_prompt}]
         
         # Get model configuration
         model_name = cl.user_session.config_manager.get_model_name()
@@ -219,7 +247,25 @@ async def on_chat_start():
 
 @cl.on_message
 async def on_message(msg: cl.Message):
-    """Handle user messages."""
+    """Handle user messages, one turn at a time per session."""
+    # A second message while a turn is still running would start another full agent run
+    # (and LLM calls) over the same conversation, so turn it away instead. The flag is kept
+    # with user_session.get/set, which are scoped to the current session
+    if cl.user_session.get("run_in_flight", False):
+        await cl.Message(
+            content="A response is still being generated. Please wait for it to finish.",
+            author="System"
+        ).send()
+        return
+
+    cl.user_session.set("run_in_flight", True)
+    try:
+        await handle_message(msg)
+    finally:
+        cl.user_session.set("run_in_flight", False)
+
+async def handle_message(msg: cl.Message):
+    """Run a single conversation turn for a user message."""
     user_input = msg.content
     conv = cl.user_session.conversation_history
     
@@ -229,7 +275,8 @@ async def on_message(msg: cl.Message):
     # Initialize state
     state = {
         "current_type": "assistant",  # Default type is assistant message
-        "is_thought": False,          # Track pending <thought> output
+        "thought_calls": set(),       # Call IDs of thoughts whose output is skipped
+        "pending_tools": {},          # Tool names of pending calls, by call ID
         "tool_count": 0               # Track the number of tool calls
     }
 
@@ -260,74 +307,71 @@ async def on_message(msg: cl.Message):
     state["assistant_msg"] = stream_msg
 
     try:
-        async with AsyncExitStack() as exit_stack:
-            logger.info("Connecting to MCP servers...")
-            mcp_servers = []
-            connection_errors = []
-            
-            # Connect to MCP servers with individual error handling
-            for server in cl.user_session.smart_agent.mcp_servers:
-                server_name = getattr(server, 'name', 'unknown')
-                try:
-                    # Use timeout for connection to prevent hanging
-                    connected_server = await asyncio.wait_for(
-                        exit_stack.enter_async_context(server),
-                        timeout=10.0
-                    )
-                    mcp_servers.append(connected_server)
-                    logger.debug(f"Connected to MCP server: {connected_server.name}")
-                except asyncio.TimeoutError:
-                    error_msg = f"Timeout connecting to MCP server: {server_name}"
-                    logger.warning(error_msg)
-                    connection_errors.append(error_msg)
-                except Exception as e:
-                    error_msg = f"Error connecting to MCP server {server_name}: {e}"
-                    logger.warning(error_msg)
-                    connection_errors.append(error_msg)
-
-            logger.info(f"Successfully connected to {len(mcp_servers)} MCP servers")
-            
-            # Show connection warnings to user if any
-            if connection_errors:
-                warning_msg = "Warning: Some MCP servers failed to connect:\n" + "\n".join(connection_errors)
-                await cl.Message(content=warning_msg, author="System").send()
+        # Reuse the MCP connections pooled by earlier messages; only servers that are not
+        # connected yet are connected, concurrently and each with its own timeout
+        mcp_servers, connection_errors = await cl.user_session.smart_agent.get_mcp_servers(
+            timeout=MCP_CONNECTION_TIMEOUT
+        )
 
+        # Show all connection warnings to the user as a single summary message,
+        # and only when they differ from the ones already shown in this session
+        if connection_errors and connection_errors != cl.user_session.get("last_connection_errors"):
+            warning_msg = "Warning: Some MCP servers failed to connect:\n" + "\n".join(f"- {error}" for error in connection_errors)
+            await cl.Message(content=warning_msg, author="System").send()
+        cl.user_session.set("last_connection_errors", connection_errors)
+
+        # Reuse the previous turn's agent while the model and connected servers are unchanged,
+        # so each turn sends an identical prompt prefix that providers can serve from cache
+        agent_key = (cl.user_session.model_name, tuple(id(server) for server in mcp_servers))
+        agent = cl.user_session.get("agent")
+        if agent is None or cl.user_session.get("agent_key") != agent_key:
+            # No instructions here: the system prompt is already the first message of the
+            # history, and passing it again would send it twice with every request
             agent = Agent(
                 name="Assistant",
-                instructions=cl.user_session.smart_agent.system_prompt,
                 model=OpenAIChatCompletionsModel(
                     model=cl.user_session.model_name,
                     openai_client=cl.user_session.smart_agent.openai_client,
                 ),
                 mcp_servers=mcp_servers,
+                model_settings=AGENT_MODEL_SETTINGS,
             )
+            cl.user_session.set("agent", agent)
+            cl.user_session.set("agent_key", agent_key)
+
+        try:
+            # Process query with timeout to prevent hanging
+            assistant_reply = await asyncio.wait_for(
+                cl.user_session.smart_agent.process_query(
+                    user_input,
+                    conv,
+                    agent=agent,
+                    assistant_msg=stream_msg,
+                    state=state
+                ),
+                timeout=300.0  # 5 minute timeout for query processing
+            )
+
+            conv.append({"role": "assistant", "content": assistant_reply})
+
+            # The reply was streamed into the message token by token, so finalize it as is
+            # instead of re-rendering the text; this also flushes and stops the batching task
+            await stream_msg.update()
+
+        except asyncio.TimeoutError:
+            error_msg = "Request timed out. Please try a simpler query or try again later."
+            logger.error("Query processing timed out")
+            # The aborted run may have left pooled connections mid-request, so start fresh next time
+            await cl.user_session.smart_agent.disconnect_mcp_servers()
+            await cl.Message(content=error_msg, author="System").send()
+            return
+        except Exception as e:
+            error_msg = f"Error processing query: {str(e)}"
+            logger.exception(error_msg)
+            await cl.user_session.smart_agent.disconnect_mcp_servers()
+            await cl.Message(content=error_msg, author="System").send()
+            return
 
-            try:
-                # Process query with timeout to prevent hanging
-                assistant_reply = await asyncio.wait_for(
-                    cl.user_session.smart_agent.process_query(
-                        user_input,
-                        conv,
-                        agent=agent,
-                        assistant_msg=stream_msg,
-                        state=state
-                    ),
-                    timeout=300.0  # 5 minute timeout for query processing
-                )
-                
-                conv.append({"role": "assistant", "content": assistant_reply})
-                
-            except asyncio.TimeoutError:
-                error_msg = "Request timed out. Please try a simpler query or try again later."
-                logger.error("Query processing timed out")
-                await cl.Message(content=error_msg, author="System").send()
-                return
-            except Exception as e:
-                error_msg = f"Error processing query: {str(e)}"
-                logger.exception(error_msg)
-                await cl.Message(content=error_msg, author="System").send()
-                return
-            
         # Log to Langfuse if enabled (with error handling)
         if cl.user_session.langfuse_enabled and cl.user_session.langfuse:
             try:
@@ -358,64 +402,24 @@ async def on_chat_end():
     """Handle chat end event with robust cleanup."""
     logger.info("Chat session ended - starting cleanup")
     
-    cleanup_tasks = []
-    
-    # Clean up the smart agent if it exists
-    if hasattr(cl.user_session, 'smart_agent') and cl.user_session.smart_agent:
+    async def run_cleanup(name, coro, timeout):
+        """Run a single cleanup step with a timeout, logging instead of raising on failure."""
         try:
-            # Create a cleanup task with timeout
-            async def cleanup_agent():
-                try:
-                    if hasattr(cl.user_session.smart_agent, 'cleanup'):
-                        await cl.user_session.smart_agent.cleanup()
-                    elif hasattr(cl.user_session.smart_agent, 'aclose'):
-                        await cl.user_session.smart_agent.aclose()
-                    logger.info("Smart agent cleaned up successfully")
-                except Exception as e:
-                    logger.error(f"Error in smart agent cleanup: {e}")
-            
-            # Add cleanup task with timeout
-            cleanup_tasks.append(asyncio.wait_for(cleanup_agent(), timeout=10.0))
-            
+            await asyncio.wait_for(coro, timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Cleanup task {name} timed out")
         except Exception as e:
-            logger.error(f"Error setting up smart agent cleanup: {e}")
+            logger.error(f"Cleanup task {name} failed: {e}")
+        else:
+            logger.info(f"Cleanup task {name} completed")
     
-    # Clean up HTTP client connections if they exist
-    if hasattr(cl.user_session, 'smart_agent') and cl.user_session.smart_agent:
-        try:
-            async def cleanup_http_client():
-                try:
-                    if hasattr(cl.user_session.smart_agent, 'openai_client'):
-                        client = cl.user_session.smart_agent.openai_client
-                        if hasattr(client, 'close'):
-                            await client.close()
-                        elif hasattr(client, 'aclose'):
-                            await client.aclose()
-                    logger.debug("HTTP client cleaned up successfully")
-                except Exception as e:
-                    logger.debug(f"Error cleaning up HTTP client: {e}")
-            
-            cleanup_tasks.append(asyncio.wait_for(cleanup_http_client(), timeout=5.0))
-            
-        except Exception as e:
-            logger.error(f"Error setting up HTTP client cleanup: {e}")
+    smart_agent = getattr(cl.user_session, 'smart_agent', None)
     
-    # Execute all cleanup tasks concurrently with individual error handling
-    if cleanup_tasks:
-        try:
-            # Use asyncio.gather with return_exceptions=True to handle individual failures
-            results = await asyncio.gather(*cleanup_tasks, return_exceptions=True)
-            
-            # Log any cleanup failures
-            for i, result in enumerate(results):
-                if isinstance(result, Exception):
-                    if isinstance(result, asyncio.TimeoutError):
-                        logger.warning(f"Cleanup task {i} timed out")
-                    else:
-                        logger.error(f"Cleanup task {i} failed: {result}")
-                        
-        except Exception as e:
-            logger.error(f"Unexpected error during cleanup: {e}")
+    # Clean up the smart agent
+    if smart_agent:
+        close = getattr(smart_agent, 'cleanup', None) or getattr(smart_agent, 'aclose', None)
+        if close is not None:
+            await run_cleanup("smart_agent", close(), 10.0)
     
     # Force cleanup of session variables
     try:
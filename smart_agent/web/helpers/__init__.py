@@ -3,6 +3,5 @@
 from smart_agent.web.helpers.setup import create_translation_files
 
 __all__ = [
-    'extract_response_from_assistant_reply',
     'create_translation_files',
 ]
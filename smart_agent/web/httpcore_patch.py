@@ -8,11 +8,33 @@ RuntimeError: Attempted to exit cancel scope in a different task
 
 import asyncio
 import logging
+import re
 import warnings
 from typing import Any
 
 logger = logging.getLogger(__name__)
 
+# Benign messages emitted while async HTTP connections are torn down,
+# matched with one compiled pattern instead of one filter entry each
+BENIGN_ASYNC_MESSAGES = re.compile(
+    r".*(?:async generator ignored GeneratorExit"
+    r"|Attempted to exit cancel scope in a different task"
+    r"|coroutine .* was never awaited)"
+)
+
+# Loggers whose benign connection-cleanup records are dropped
+NOISY_ASYNC_LOGGERS = ("httpcore", "anyio", "httpx")
+
+
+class BenignAsyncMessageFilter(logging.Filter):
+    """Logging filter that drops the known benign async cleanup messages."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return not BENIGN_ASYNC_MESSAGES.match(record.getMessage())
+
+
+_benign_async_message_filter = BenignAsyncMessageFilter()
+
 def patch_httpcore():
     """Apply monkey patches to fix httpcore async generator issues."""
     try:
@@ -172,21 +194,18 @@ def patch_httpcore():
 
 def suppress_async_warnings():
     """Suppress specific async-related warnings."""
-    # Suppress the specific warnings
-    warnings.filterwarnings("ignore", 
-                          category=RuntimeWarning, 
-                          message=".*async generator ignored GeneratorExit.*")
-    warnings.filterwarnings("ignore", 
-                          category=RuntimeWarning, 
-                          message=".*Attempted to exit cancel scope in a different task.*")
-    warnings.filterwarnings("ignore", 
-                          category=RuntimeWarning, 
-                          message=".*coroutine.*was never awaited.*")
-    
-    # Suppress module-level warnings
-    warnings.filterwarnings("ignore", module="httpcore.*")
-    warnings.filterwarnings("ignore", module="anyio.*")
-    
+    # Suppress only the known benign RuntimeWarnings, so other warnings from
+    # httpcore/anyio still surface when debugging
+    warnings.filterwarnings("ignore",
+                          category=RuntimeWarning,
+                          message=BENIGN_ASYNC_MESSAGES.pattern)
+
+    # Drop the same messages when they arrive as log records
+    for logger_name in NOISY_ASYNC_LOGGERS:
+        noisy_logger = logging.getLogger(logger_name)
+        if _benign_async_message_filter not in noisy_logger.filters:
+            noisy_logger.addFilter(_benign_async_message_filter)
+
     logger.debug("Applied async warning suppressions")
 
 # Apply patches immediately when module is imported
@@ -6,10 +6,11 @@ eliminate the runtime errors that occur with httpcore and anyio.
 """
 
 import sys
-import warnings
 import logging
 from io import StringIO
 
+from .httpcore_patch import suppress_async_warnings
+
 logger = logging.getLogger(__name__)
 
 class ErrorSuppressor:
@@ -47,19 +48,9 @@ class ErrorSuppressor:
 def install_global_error_suppression():
     """Install global error suppression for runtime errors."""
     
-    # Suppress warnings at the warnings module level
-    warnings.filterwarnings("ignore", category=RuntimeWarning, 
-                          message=".*async generator ignored GeneratorExit.*")
-    warnings.filterwarnings("ignore", category=RuntimeWarning, 
-                          message=".*cancel scope in a different task.*")
-    warnings.filterwarnings("ignore", category=RuntimeWarning, 
-                          message=".*coroutine.*was never awaited.*")
-    
-    # Suppress module-level warnings
-    warnings.filterwarnings("ignore", module="httpcore.*")
-    warnings.filterwarnings("ignore", module="anyio.*")
-    warnings.filterwarnings("ignore", module="httpx.*")
-    
+    # Suppress the benign warnings and log records at the source
+    suppress_async_warnings()
+
     # Install a custom excepthook to suppress specific errors
     original_excepthook = sys.excepthook
     
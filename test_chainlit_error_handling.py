@@ -9,19 +9,15 @@ related to async HTTP connections and resource cleanup.
 import asyncio
 import logging
 import sys
-import warnings
 from contextlib import AsyncExitStack
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Apply the same warning filters as in chainlit_app.py
-warnings.filterwarnings("ignore", category=RuntimeWarning, message=".*async generator ignored GeneratorExit.*")
-warnings.filterwarnings("ignore", category=RuntimeWarning, message=".*Attempted to exit cancel scope in a different task.*")
-warnings.filterwarnings("ignore", category=RuntimeWarning, message=".*coroutine.*was never awaited.*")
-warnings.filterwarnings("ignore", module="httpcore.*")
-warnings.filterwarnings("ignore", module="anyio.*")
+# Apply the same warning suppression as chainlit_app.py
+from smart_agent.web.httpcore_patch import suppress_async_warnings
+suppress_async_warnings()
 
 
 class MockMCPServer:
@@ -95,8 +91,6 @@ async def test_cleanup_robustness():
     """Test cleanup with timeout handling."""
     logger.info("Testing cleanup robustness...")
     
-    cleanup_tasks = []
-    
     # Simulate various cleanup scenarios
     async def quick_cleanup():
         await asyncio.sleep(0.1)
@@ -110,22 +104,28 @@ async def test_cleanup_robustness():
         await asyncio.sleep(0.1)
         raise Exception("Cleanup failed")
     
-    # Add cleanup tasks with timeouts
-    cleanup_tasks.append(asyncio.wait_for(quick_cleanup(), timeout=5.0))
-    cleanup_tasks.append(asyncio.wait_for(slow_cleanup(), timeout=5.0))
-    cleanup_tasks.append(asyncio.wait_for(failing_cleanup(), timeout=5.0))
+    # Run all cleanup tasks concurrently under one shared deadline
+    cleanup_tasks = [
+        asyncio.create_task(quick_cleanup()),
+        asyncio.create_task(slow_cleanup()),
+        asyncio.create_task(failing_cleanup()),
+    ]
     
     # Execute all cleanup tasks with individual error handling
     try:
-        results = await asyncio.gather(*cleanup_tasks, return_exceptions=True)
+        done, pending = await asyncio.wait(cleanup_tasks, timeout=5.0)
+        
+        # Cancel whatever missed the deadline so it releases its resources right away
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
         
         success_count = 0
-        for i, result in enumerate(results):
-            if isinstance(result, Exception):
-                if isinstance(result, asyncio.TimeoutError):
-                    logger.warning(f"Cleanup task {i} timed out")
-                else:
-                    logger.error(f"Cleanup task {i} failed: {result}")
+        for i, task in enumerate(cleanup_tasks):
+            if task in pending:
+                logger.warning(f"Cleanup task {i} timed out")
+            elif task.exception() is not None:
+                logger.error(f"Cleanup task {i} failed: {task.exception()}")
             else:
                 success_count += 1
                 logger.info(f"Cleanup task {i} succeeded")
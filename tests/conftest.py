@@ -3,11 +3,18 @@ Global pytest fixtures and configuration for Smart Agent tests.
 """
 
 import os
+import asyncio
+import json
 import pytest
 import yaml
 import tempfile
 import shutil
-from unittest.mock import Mock, patch
+from dataclasses import dataclass
+from typing import Optional
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from openai.types.responses import ResponseTextDeltaEvent
 
 from smart_agent.tool_manager import ConfigManager
 
@@ -89,14 +96,122 @@ def mock_config(mock_config_dir):
     return config_manager
 
 
+# Tool configuration served by the shared mock config manager
+SEARCH_TOOL_CONFIG = {
+    "name": "Search Tool",
+    "url": "http://localhost:8001/sse",
+    "enabled": True,
+    "type": "uvx",
+    "repository": "search-tool",
+    "command": "npx search-tool --port {port}",
+}
+
+
+@pytest.fixture(scope="session")
+def mock_config_manager():
+    """Create a MagicMock ConfigManager wired with a single search tool, once per session."""
+    config_manager = MagicMock()
+
+    # Mock get_config to return a localhost URL for api.base_url so the LiteLLM proxy is used
+    def get_config_side_effect(section=None, key=None, default=None):
+        if section == "api" and key == "base_url":
+            return "http://localhost:8000"
+        return default
+
+    config_manager.get_config.side_effect = get_config_side_effect
+    config_manager.get_api_base_url.return_value = "http://localhost:8000"
+    config_manager.get_model_name.return_value = "gpt-4"
+    config_manager.get_model_temperature.return_value = 0.7
+    config_manager.get_litellm_config.return_value = {"enabled": True}
+    config_manager.get_log_level.return_value = "INFO"
+    config_manager.get_log_file.return_value = None
+
+    # Tool configuration
+    config_manager.get_all_tools.return_value = {"search_tool": SEARCH_TOOL_CONFIG}
+    config_manager.get_tools_config.return_value = {"search_tool": SEARCH_TOOL_CONFIG}
+    config_manager.get_tool_config.return_value = SEARCH_TOOL_CONFIG
+    config_manager.get_tool_command.return_value = SEARCH_TOOL_CONFIG["command"]
+    config_manager.get_env_prefix.return_value = "SEARCH_TOOL"
+    config_manager.is_tool_enabled.return_value = True
+
+    return config_manager
+
+
+# Return values of the config getters BaseSmartAgent reads while it is constructed
+AGENT_CONFIG_RETURN_VALUES = {
+    "get_api_key": "test-api-key",
+    "get_api_base_url": "https://api.openai.com/v1",
+    "get_model_name": "gpt-4",
+    "get_model_temperature": 0.7,
+    "get_langfuse_config": {"enabled": False},
+    "get_tools_config": {},
+}
+
+
 @pytest.fixture
+def mock_agent_config():
+    """Create a MagicMock ConfigManager with the settings needed to construct an agent."""
+    return MagicMock(**{
+        f"{getter}.return_value": value for getter, value in AGENT_CONFIG_RETURN_VALUES.items()
+    })
+
+
+@pytest.fixture(scope="session")
+def mock_openai_client():
+    """Create one OpenAI client mock shared by every agent built in the session.
+
+    Agents given a client don't own it, so they never close it; passing this one in
+    spares each test from building a real client and its HTTP connection pool.
+    """
+    return MagicMock()
+
+
+@pytest.fixture(autouse=True)
+def _reset_mock_config_manager(request):
+    """Clear the shared mock config manager's call history before each test that uses it.
+
+    reset_mock() keeps the configured return values and side effects, so the mock is only
+    built once per session while every test still starts from a clean call record.
+    """
+    if "mock_config_manager" in request.fixturenames:
+        request.getfixturevalue("mock_config_manager").reset_mock()
+
+
+@pytest.fixture(autouse=True)
+async def _no_leaked_tasks():
+    """Fail a test that leaves tasks running, since every test shares the session event loop.
+
+    Tasks get a moment to finish first, so cleanup scheduled by a test (such as an agent
+    closing itself when it is garbage collected) is not mistaken for a leak.
+    """
+    yield
+    leaked = asyncio.all_tasks() - {asyncio.current_task()}
+    if leaked:
+        _, leaked = await asyncio.wait(leaked, timeout=1.0)
+    assert not leaked, f"Test left tasks running on the shared event loop: {leaked}"
+
+
+@dataclass
+class FakeProcess:
+    """Stand-in for a running tool process with only the attributes the code touches."""
+
+    pid: int = 12345
+    returncode: Optional[int] = None  # Process still running
+
+    def poll(self):
+        return self.returncode
+
+    def terminate(self):
+        pass
+
+    def wait(self, timeout=None):
+        return 0
+
+
+@pytest.fixture(scope="session")
 def mock_process():
     """Mock subprocess for tool processes."""
-    process_mock = Mock()
-    process_mock.pid = 12345
-    process_mock.returncode = None
-    process_mock.poll.return_value = None  # Process still running
-    return process_mock
+    return FakeProcess()
 
 
 @pytest.fixture
@@ -112,3 +227,85 @@ def mock_docker():
     with patch("subprocess.run") as mock_run:
         mock_run.return_value.returncode = 0
         yield mock_run
+
+
+def _text_delta(text):
+    """Build a raw response event carrying a text delta."""
+    data = ResponseTextDeltaEvent.model_construct(delta=text, type="response.output_text.delta")
+    return SimpleNamespace(type="raw_response_event", data=data)
+
+
+def _run_item(item_type, **fields):
+    """Build a run item stream event."""
+    return SimpleNamespace(type="run_item_stream_event", item=SimpleNamespace(type=item_type, **fields))
+
+
+def _tool_call(call_id="call_1", name="search", **arguments):
+    """Build a tool call event with the given arguments."""
+    raw_item = SimpleNamespace(call_id=call_id, name=name, arguments=json.dumps(arguments))
+    return _run_item("tool_call_item", raw_item=raw_item)
+
+
+def _tool_output(text, call_id="call_1"):
+    """Build the output event of a tool call, paired with the call by its ID."""
+    output = json.dumps({"text": text})
+    return _run_item("tool_call_output_item", raw_item={"call_id": call_id, "output": output}, output=output)
+
+
+def _assistant_message(*parts):
+    """Build an assistant message output event from (type, text) content parts."""
+    content = [SimpleNamespace(type=part_type, text=text) for part_type, text in parts]
+    return _run_item("message_output_item", raw_item=SimpleNamespace(role="assistant", content=content))
+
+
+# Scripted Runner.run_streamed event streams, built once and replayed by scenario name
+MOCK_LLM_SCENARIOS = {
+    # A plain text reply
+    "content-only": [
+        _text_delta("Hello! "),
+        _text_delta("How can I help?"),
+        _assistant_message(("output_text", "Hello! How can I help?")),
+    ],
+    # A tool call followed by a reply built from its output
+    "tool-call": [
+        _tool_call(query="weather"),
+        _tool_output("sunny"),
+        _text_delta("It is sunny."),
+        _assistant_message(("output_text", "It is sunny.")),
+    ],
+    # A message before and after a tool call, the last one split around a refusal part
+    "multi-turn": [
+        _text_delta("Let me check. "),
+        _tool_call(query="weather"),
+        _tool_output("sunny"),
+        _assistant_message(("output_text", "Let me check. ")),
+        _text_delta("It is sunny."),
+        _assistant_message(("output_text", "It is "), ("refusal", "no"), ("output_text", "sunny.")),
+    ],
+    # A thought and two tool calls made in parallel, their outputs only following all the calls
+    "parallel-tool-calls": [
+        _tool_call(call_id="call_1", name="think", thought="Check both cities."),
+        _tool_call(call_id="call_2", name="weather", city="Paris"),
+        _tool_call(call_id="call_3", name="news", city="Rome"),
+        _tool_output("Thought recorded.", call_id="call_1"),
+        _tool_output("sunny in Paris", call_id="call_2"),
+        _tool_output("festival in Rome", call_id="call_3"),
+        _text_delta("Done."),
+        _assistant_message(("output_text", "Done.")),
+    ],
+}
+
+
+@pytest.fixture
+def mock_llm():
+    """Return a factory for streamed run results that replay a scripted scenario."""
+    def run_streamed(scenario):
+        events = MOCK_LLM_SCENARIOS[scenario]
+
+        async def stream_events():
+            for event in events:
+                yield event
+
+        return SimpleNamespace(stream_events=stream_events)
+
+    return run_streamed
@@ -30,7 +30,7 @@ class TestSmartAgentE2E:
     @patch("smart_agent.commands.start.start_tools")
     @patch("smart_agent.proxy_manager.ProxyManager.get_litellm_proxy_status")
     async def test_chat_session_with_tools(
-        self, mock_launch_proxy, mock_launch_tools, mock_model
+        self, mock_launch_proxy, mock_launch_tools, mock_model, mock_config_manager
     ):
         """Test a complete chat session with tool usage."""
         # Setup mock processes
@@ -39,45 +39,18 @@ class TestSmartAgentE2E:
         # Return a status for get_litellm_proxy_status
         mock_launch_proxy.return_value = {"running": True, "port": 8000, "container_id": "abc123"}
 
-        # Setup model mock
-        mock_model_instance = MagicMock()
-        mock_model.return_value = mock_model_instance
-
-        # Create a mock config manager
-        mock_config_manager = MagicMock()
-
-        # Mock get_config to return a localhost URL for api.base_url to ensure litellm_proxy is called
-        def get_config_side_effect(section=None, key=None, default=None):
-            if section == "api" and key == "base_url":
-                return "http://localhost:8000"
-            return default
-
-        mock_config_manager.get_config.side_effect = get_config_side_effect
-
-        # Mock get_api_base_url to return a localhost URL to ensure litellm_proxy is called
-        mock_config_manager.get_api_base_url.return_value = "http://localhost:8000"
-
-        mock_config_manager.get_model_name.return_value = "gpt-4"
-        mock_config_manager.get_model_temperature.return_value = 0.7
-
-        # Mock get_litellm_config to return a config with enabled=True
-        mock_config_manager.get_litellm_config.return_value = {"enabled": True}
-
         # Setup for start command
-        with patch("smart_agent.tool_manager.ConfigManager", return_value=mock_config_manager):
-            with patch("sys.exit"):
-                # Call start with background=True to start all services
-                start.callback(config=None, background=True, debug=False)
+        with patch("smart_agent.commands.start.ConfigManager", return_value=mock_config_manager), \
+                patch("sys.exit"):
+            # Call start with background=True to start all services
+            start.callback(config=None, background=True, debug=False)
 
         # Verify that start_tools and get_litellm_proxy_status were called
         assert mock_launch_tools.called
         assert mock_launch_proxy.called
 
         # Create agent with mocked components
-        with patch("smart_agent.agent.Agent") as mock_agent_class:
-            mock_agent = MagicMock()
-            mock_agent_class.return_value = mock_agent
-
+        with patch("smart_agent.agent.Agent"):
             # Initialize the SmartAgent
             agent = SmartAgent(model_name="gpt-4")
 
@@ -94,7 +67,7 @@ class TestSmartAgentE2E:
 
         # Test stopping services
         with patch("subprocess.run") as mock_run:
-            stop.callback(config=None, tools=None, all=True, debug=False)
+            stop.callback(config=None, all=True, debug=False)
 
             # Verify subprocess.run was called to stop services
             assert mock_run.called
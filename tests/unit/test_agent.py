@@ -2,8 +2,10 @@
 Unit tests for the Agent module.
 """
 
+import asyncio
 import pytest
-from unittest.mock import patch, MagicMock
+from types import SimpleNamespace
+from unittest.mock import patch, MagicMock, AsyncMock
 
 # Check if required classes from agents package are available
 try:
@@ -19,29 +21,34 @@ from smart_agent.core.agent import BaseSmartAgent
 pytestmark = pytest.mark.skipif(not agents_classes_available, reason="Required classes from agents package not available")
 
 
+@pytest.fixture
+def agent(mock_agent_config, mock_openai_client):
+    """Create a BaseSmartAgent with no MCP servers configured."""
+    return BaseSmartAgent(mock_agent_config, openai_client=mock_openai_client)
+
+
+@pytest.fixture
+def failing_server():
+    """Create an SSE server mock whose connection attempts are refused."""
+    server = MagicMock(spec=MCPServerSse)
+    server.name = "test_server"
+    server.params = {"url": "http://localhost:8000/sse"}
+    server.client_session_timeout_seconds = 5
+    server._cache_tools_list = True
+    server.connect.side_effect = ConnectionError("connection refused")
+    return server
+
+
 class TestSmartAgent:
     """Test suite for the BaseSmartAgent class."""
 
-    def test_agent_initialization(self):
+    def test_agent_initialization(self, mock_agent_config, mock_openai_client):
         """Test agent initialization with basic parameters."""
-        # Create mock objects
-        mock_openai_client = MagicMock()
-        mock_mcp_servers = [MagicMock()]
         model_name = "gpt-4"
         system_prompt = "You are a helpful assistant."
 
-        # Create a mock config manager
-        mock_config_manager = MagicMock()
-        mock_config_manager.get_api_key.return_value = "test-api-key"
-        mock_config_manager.get_api_base_url.return_value = "https://api.openai.com/v1"
-        mock_config_manager.get_model_name.return_value = model_name
-        mock_config_manager.get_model_temperature.return_value = 0.7
-        mock_config_manager.get_langfuse_config.return_value = {"enabled": False}
-        mock_config_manager.get_tools_config.return_value = {}
-        
         # Initialize the agent with the mock config manager
-        agent = BaseSmartAgent(mock_config_manager)
-        agent.openai_client = mock_openai_client
+        agent = BaseSmartAgent(mock_agent_config, openai_client=mock_openai_client)
         agent.mcp_servers = []
         agent.system_prompt = system_prompt
 
@@ -53,19 +60,12 @@ class TestSmartAgent:
         # agent.agent is None because mcp_servers is empty
 
     @patch("smart_agent.core.agent.AsyncOpenAI")  # Patch at the correct import location
-    def test_agent_without_initialization(self, mock_openai_client):
+    def test_agent_without_initialization(self, mock_openai_client, mock_agent_config):
         """Test agent creation with minimal configuration."""
-        # Create a minimal mock config manager
-        mock_config_manager = MagicMock()
-        mock_config_manager.get_api_key.return_value = "test-api-key"  # Provide a dummy API key
-        mock_config_manager.get_api_base_url.return_value = "https://api.openai.com/v1"
-        mock_config_manager.get_model_name.return_value = None
-        mock_config_manager.get_model_temperature.return_value = 0.7
-        mock_config_manager.get_langfuse_config.return_value = {"enabled": False}
-        mock_config_manager.get_tools_config.return_value = {}
+        mock_agent_config.get_model_name.return_value = None
         
         # Initialize the agent with the mock config manager
-        agent = BaseSmartAgent(mock_config_manager)
+        agent = BaseSmartAgent(mock_agent_config)
         
         # Verify that the agent properties are set correctly
         assert agent.model_name is None
@@ -76,26 +76,13 @@ class TestSmartAgent:
 
     @patch("agents.Agent")
     @patch("agents.OpenAIChatCompletionsModel")
-    def test_initialize_agent(self, mock_model_class, mock_agent_class):
+    def test_initialize_agent(self, mock_model_class, mock_agent_class, mock_agent_config, mock_openai_client):
         """Test the _initialize_agent method."""
-        # Create mock objects
-        mock_openai_client = MagicMock()
-        mock_mcp_servers = [MagicMock()]
         model_name = "gpt-4"
         system_prompt = "You are a helpful assistant."
 
-        # Create a mock config manager
-        mock_config_manager = MagicMock()
-        mock_config_manager.get_api_key.return_value = "test-api-key"
-        mock_config_manager.get_api_base_url.return_value = "https://api.openai.com/v1"
-        mock_config_manager.get_model_name.return_value = model_name
-        mock_config_manager.get_model_temperature.return_value = 0.7
-        mock_config_manager.get_langfuse_config.return_value = {"enabled": False}
-        mock_config_manager.get_tools_config.return_value = {}
-        
         # Initialize the agent with the mock config manager
-        agent = BaseSmartAgent(mock_config_manager)
-        agent.openai_client = mock_openai_client
+        agent = BaseSmartAgent(mock_agent_config, openai_client=mock_openai_client)
         agent.mcp_servers = []
         agent.system_prompt = system_prompt
 
@@ -105,23 +92,10 @@ class TestSmartAgent:
         # mock_agent_class.assert_called_once_with(name="Assistant", instructions=system_prompt, model=mock_model_class.return_value, mcp_servers=[])
 
     @patch("agents.Runner")
-    def test_process_message(self, mock_runner):
+    def test_process_message(self, mock_runner, mock_agent_config, mock_openai_client):
         """Test the process_message method."""
-        # Setup
-        mock_openai_client = MagicMock()
-        mock_mcp_servers = [MagicMock()]
-        # Create a mock config manager
-        mock_config_manager = MagicMock()
-        mock_config_manager.get_api_key.return_value = "test-api-key"
-        mock_config_manager.get_api_base_url.return_value = "https://api.openai.com/v1"
-        mock_config_manager.get_model_name.return_value = "gpt-4"
-        mock_config_manager.get_model_temperature.return_value = 0.7
-        mock_config_manager.get_langfuse_config.return_value = {"enabled": False}
-        mock_config_manager.get_tools_config.return_value = {}
-        
         # Initialize the agent with the mock config manager
-        agent = BaseSmartAgent(mock_config_manager)
-        agent.openai_client = mock_openai_client
+        agent = BaseSmartAgent(mock_agent_config, openai_client=mock_openai_client)
         agent.mcp_servers = []
 
         # Create test data
@@ -134,19 +108,12 @@ class TestSmartAgent:
         assert hasattr(agent, "process_query")
 
     @patch("smart_agent.core.agent.AsyncOpenAI")  # Patch at the correct import location
-    def test_process_message_without_agent(self, mock_openai_client):
+    def test_process_message_without_agent(self, mock_openai_client, mock_agent_config):
         """Test that BaseSmartAgent has an abstract method process_query."""
-        # Setup - create a minimal mock config manager
-        mock_config_manager = MagicMock()
-        mock_config_manager.get_api_key.return_value = "test-api-key"  # Provide a dummy API key
-        mock_config_manager.get_api_base_url.return_value = "https://api.openai.com/v1"
-        mock_config_manager.get_model_name.return_value = None
-        mock_config_manager.get_model_temperature.return_value = 0.7
-        mock_config_manager.get_langfuse_config.return_value = {"enabled": False}
-        mock_config_manager.get_tools_config.return_value = {}
+        mock_agent_config.get_model_name.return_value = None
         
         # Initialize the agent with the mock config manager
-        agent = BaseSmartAgent(mock_config_manager)
+        agent = BaseSmartAgent(mock_agent_config)
         
         # Check if process_query is an abstract method
         from abc import abstractmethod
@@ -158,19 +125,216 @@ class TestSmartAgent:
         # Check if it's decorated with @abstractmethod
         assert getattr(process_query_method, '__isabstractmethod__', False)
 
-    def test_setup_mcp_servers_method_exists(self):
+    def test_setup_mcp_servers_method_exists(self, agent):
         """Test that the setup_mcp_servers method exists."""
-        # Create a mock config manager
-        mock_config_manager = MagicMock()
-        mock_config_manager.get_api_key.return_value = "test-api-key"
-        mock_config_manager.get_api_base_url.return_value = "https://api.openai.com/v1"
-        mock_config_manager.get_model_name.return_value = "gpt-4"
-        mock_config_manager.get_model_temperature.return_value = 0.7
-        mock_config_manager.get_langfuse_config.return_value = {"enabled": False}
-        mock_config_manager.get_tools_config.return_value = {}
-        
-        # Initialize the agent with the mock config manager
-        agent = BaseSmartAgent(mock_config_manager)
-        
         # Just verify the method exists
         assert hasattr(agent, "_setup_mcp_servers")
+
+    def test_setup_mcp_servers_dispatches_by_transport(self, mock_agent_config, mock_openai_client):
+        """Test that each transport type is built with the matching server class."""
+        from smart_agent.core.mcp_server import MCPServerStreamableHttp
+
+        # Serve one tool per transport
+        mock_agent_config.get_tool_timeout.side_effect = lambda tool_id, name, default: default
+        mock_agent_config.get_tools_config.return_value = {
+            "sse_tool": {"enabled": True, "transport": "sse", "url": "http://localhost:8000/sse"},
+            "http_tool": {"enabled": True, "transport": "Streamable-HTTP", "url": "http://localhost:8001/mcp"},
+            "bad_tool": {"enabled": True, "transport": "carrier_pigeon", "url": "http://localhost:8002"},
+            "no_url_tool": {"enabled": True, "transport": "sse"},
+            "disabled_tool": {"enabled": False, "transport": "sse", "url": "http://localhost:8003/sse"},
+        }
+
+        agent = BaseSmartAgent(mock_agent_config, openai_client=mock_openai_client)
+
+        assert [server.name for server in agent.mcp_servers] == ["sse_tool", "http_tool"]
+        assert isinstance(agent.mcp_servers[0], MCPServerSse)
+        assert isinstance(agent.mcp_servers[1], MCPServerStreamableHttp)
+
+    def test_setup_mcp_servers_warns_once_per_bad_tool(self, caplog, mock_agent_config, mock_openai_client):
+        """Test that a misconfigured tool is reported once, not for every agent built."""
+        mock_agent_config.get_tools_config.return_value = {
+            "warn_once_tool": {"enabled": True, "transport": "Smoke_Signals", "url": "http://localhost:8002"},
+        }
+
+        with caplog.at_level("WARNING", logger="smart_agent.core.agent"):
+            BaseSmartAgent(mock_agent_config, openai_client=mock_openai_client)
+            BaseSmartAgent(mock_agent_config, openai_client=mock_openai_client)
+
+        warnings = [message for message in caplog.messages if "warn_once_tool" in message]
+        assert len(warnings) == 1
+        # The warning shows the transport as configured, not lowercased
+        assert "'Smoke_Signals'" in warnings[0]
+
+    @pytest.mark.asyncio
+    async def test_connect_retries_with_recreated_server(self, agent, failing_server):
+        """Test that a failed MCP connection is retried on a recreated server."""
+        agent.mcp_servers = [failing_server]
+
+        with patch.object(agent, "_wait_for_shutdown", AsyncMock(return_value=False)) as mock_wait:
+            await agent.connect(jitter="none")
+
+        # The server is replaced by a fresh, connected instance after one backoff delay
+        mock_wait.assert_awaited_once_with(0.5)
+        assert agent.mcp_servers[0] is not failing_server
+        assert isinstance(agent.mcp_servers[0], MCPServerSse)
+        assert agent.mcp_servers[0].name == "test_server"
+        assert agent.mcp_servers[0]._connected is True
+
+    @pytest.mark.asyncio
+    async def test_connect_deadline_skips_retries(self, agent, failing_server):
+        """Test that no retry is attempted once it would overrun the connect deadline."""
+        agent.mcp_servers = [failing_server]
+
+        with patch.object(agent, "_wait_for_shutdown", AsyncMock(return_value=False)) as mock_wait:
+            await agent.connect(jitter="none", deadline=0.1)
+
+        # The first 0.5s retry delay already exceeds the budget
+        mock_wait.assert_not_awaited()
+        failing_server.connect.assert_awaited_once()
+        assert agent.mcp_servers[0] is failing_server
+
+    @pytest.mark.asyncio
+    async def test_connect_caps_server_retry_hint(self, agent, failing_server):
+        """Test that a long Retry-After header delays the retry by at most the max delay."""
+        import httpx
+        from smart_agent.core.agent import MCP_CONNECT_RETRY_MAX_DELAY
+
+        request = httpx.Request("GET", "http://localhost:8000/sse")
+        response = httpx.Response(503, headers={"Retry-After": "3600"}, request=request)
+        failing_server.connect.side_effect = httpx.HTTPStatusError("Service Unavailable", request=request, response=response)
+        agent.mcp_servers = [failing_server]
+
+        with patch.object(agent, "_wait_for_shutdown", AsyncMock(return_value=False)) as mock_wait:
+            await agent.connect(jitter="none")
+
+        mock_wait.assert_awaited_once_with(MCP_CONNECT_RETRY_MAX_DELAY)
+
+    @pytest.mark.asyncio
+    async def test_aclose_interrupts_connect_retry(self, agent, failing_server):
+        """Test that closing the agent stops a pending connection retry without waiting it out."""
+        agent.mcp_servers = [failing_server]
+
+        with patch("smart_agent.core.agent._jittered_delay", return_value=60.0):
+            connect_task = asyncio.create_task(agent.connect())
+            await asyncio.sleep(0.01)
+            await agent.aclose()
+            await asyncio.wait_for(connect_task, timeout=1.0)
+
+        # The retry was abandoned rather than recreating the server
+        failing_server.connect.assert_awaited_once()
+        assert agent.mcp_servers[0] is failing_server
+
+    @pytest.mark.asyncio
+    async def test_aclose_keeps_shared_openai_client_open(self, mock_agent_config):
+        """Test that a shared OpenAI client is reused as is and not closed with the agent."""
+        shared_client = MagicMock()
+        shared_client.close = AsyncMock()
+
+        agent = BaseSmartAgent(mock_agent_config, openai_client=shared_client)
+        assert agent.openai_client is shared_client
+
+        await agent.aclose()
+        shared_client.close.assert_not_awaited()
+
+    def test_close_cleans_up_on_a_temporary_loop_and_closes_it(self, agent):
+        """Test that close() outside any event loop doesn't leak the loop it creates."""
+        loop = asyncio.new_event_loop()
+
+        with patch("smart_agent.core.agent.asyncio.get_event_loop", side_effect=RuntimeError("no current event loop")), \
+                patch("smart_agent.core.agent.asyncio.new_event_loop", return_value=loop):
+            agent.close()
+
+        assert agent._cleanup_done
+        assert loop.is_closed()
+
+    def test_create_openai_client_keeps_connections_alive_between_turns(self):
+        """Test that pooled model API connections outlive httpx's default 5s keep-alive."""
+        from openai import DefaultAsyncHttpxClient
+        from smart_agent.core.agent import create_openai_client, OPENAI_KEEPALIVE_EXPIRY, OPENAI_MAX_CONNECTIONS
+
+        with patch("smart_agent.core.agent.DefaultAsyncHttpxClient", wraps=DefaultAsyncHttpxClient) as mock_http_client:
+            client = create_openai_client("https://api.openai.com/v1", "test-api-key")
+
+        assert client.max_retries == 3
+        limits = mock_http_client.call_args.kwargs["limits"]
+        assert limits.keepalive_expiry == OPENAI_KEEPALIVE_EXPIRY
+        assert OPENAI_KEEPALIVE_EXPIRY > 5.0
+        # Every connection a burst of concurrent sessions opens stays pooled for the next turn
+        assert limits.max_keepalive_connections == limits.max_connections == OPENAI_MAX_CONNECTIONS
+
+    def test_get_retry_hint_reads_retry_after_header(self):
+        """Test that a Retry-After header on a 503 response is used as the retry hint."""
+        import httpx
+        from smart_agent.core.agent import _get_retry_hint
+
+        request = httpx.Request("GET", "http://localhost:8000/sse")
+        response = httpx.Response(503, headers={"Retry-After": "7"}, request=request)
+        error = httpx.HTTPStatusError("Service Unavailable", request=request, response=response)
+
+        # The hint is found even when the HTTP error is wrapped by the transport
+        try:
+            raise RuntimeError("connection failed") from error
+        except RuntimeError as wrapped:
+            assert _get_retry_hint(wrapped) == 7.0
+
+        assert _get_retry_hint(ConnectionError("connection refused")) is None
+
+    def test_describe_connection_error_reports_root_of_exception_group(self):
+        """Test that exception groups from the MCP transports expose their root cause."""
+        from smart_agent.core.agent import describe_connection_error
+
+        root = ConnectionError("connection refused")
+        error = ExceptionGroup("unhandled errors in a TaskGroup", [ExceptionGroup("nested", [root])])
+
+        assert "ConnectionError('connection refused')" in describe_connection_error(error)
+        assert describe_connection_error(root) == "connection refused"
+
+    def test_assistant_message_text_matches_item_helpers(self):
+        """Test that the message text matches the SDK helper for single and multi-part messages."""
+        from agents import ItemHelpers
+        from agents.items import MessageOutputItem
+        from openai.types.responses import ResponseOutputMessage, ResponseOutputRefusal, ResponseOutputText
+        from smart_agent.core.agent import assistant_message_text
+
+        def message(*content):
+            raw_item = ResponseOutputMessage(
+                id="msg", type="message", role="assistant", status="completed", content=list(content)
+            )
+            return MessageOutputItem(agent=SimpleNamespace(name="Assistant"), raw_item=raw_item)
+
+        hello = ResponseOutputText(type="output_text", text="Hello, ", annotations=[])
+        world = ResponseOutputText(type="output_text", text="world!", annotations=[])
+        refusal = ResponseOutputRefusal(type="refusal", refusal="no")
+
+        for item in (message(hello), message(refusal), message(hello, refusal, world), message()):
+            assert assistant_message_text(item) == ItemHelpers.text_message_output(item)
+
+    @pytest.mark.parametrize("arguments, expected", [
+        ("", {}),
+        ("{}", {}),
+        ('{"query": "weather", "limit": 3}', {"query": "weather", "limit": 3}),
+    ])
+    def test_tool_call_arguments(self, arguments, expected):
+        """Test that tool call arguments are parsed, with calls without arguments giving an empty dict."""
+        from smart_agent.core.agent import tool_call_arguments
+
+        item = SimpleNamespace(raw_item=SimpleNamespace(name="search", arguments=arguments))
+
+        assert tool_call_arguments(item) == expected
+
+    @pytest.mark.parametrize("jitter", ["full", "decorrelated", "none"])
+    def test_jittered_delay_stays_within_bounds(self, jitter):
+        """Test that every jitter strategy keeps the delay within the backoff window."""
+        from smart_agent.core.agent import (
+            _jittered_delay,
+            MCP_CONNECT_RETRY_BASE_DELAY,
+            MCP_CONNECT_RETRY_MAX_DELAY,
+        )
+
+        for _ in range(100):
+            delay = _jittered_delay(2.0, jitter, last_delay=4.0)
+            assert 0 <= delay <= MCP_CONNECT_RETRY_MAX_DELAY
+            if jitter == "none":
+                assert delay == 2.0
+            if jitter == "decorrelated":
+                assert delay >= MCP_CONNECT_RETRY_BASE_DELAY
@@ -0,0 +1,85 @@
+"""
+Unit tests for the Chainlit agent.
+"""
+
+import asyncio
+from contextlib import AsyncExitStack
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+pytest.importorskip("chainlit")
+
+from smart_agent.core.chainlit_agent import ChainlitSmartAgent
+
+
+class FakeServer:
+    """MCP server stand-in that connects once `ready` is set and records when it is closed."""
+
+    def __init__(self, name, ready):
+        self.name = name
+        self.ready = ready
+        self.exit_stack = AsyncExitStack()
+        self.entered = False
+        self.closed = False
+
+    async def __aenter__(self):
+        await self.ready.wait()
+        self.entered = True
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.closed = True
+
+
+class TestChainlitSmartAgent:
+    """Test suite for the ChainlitSmartAgent class."""
+
+    @pytest.mark.asyncio
+    async def test_closing_mid_connect_closes_servers_already_connected(self):
+        """Test that a server connected before the session closed is not left open."""
+        agent = ChainlitSmartAgent.__new__(ChainlitSmartAgent)
+        agent.mcp_sessions = {}
+        agent.closing = asyncio.Event()
+        agent._cleanup_done = True
+
+        connected = asyncio.Event()
+        fast = FakeServer("fast", connected)
+        slow = FakeServer("slow", asyncio.Event())
+
+        async def close_after_first_connect():
+            await connected.wait()
+            await asyncio.sleep(0)
+            agent.closing.set()
+
+        closer = asyncio.create_task(close_after_first_connect())
+        connected.set()
+        with pytest.raises(asyncio.CancelledError):
+            await agent.connect_mcp_servers([fast, slow])
+        await closer
+
+        assert fast.entered and fast.closed
+        assert not slow.entered
+        assert agent.mcp_sessions == {}
+
+    @pytest.mark.asyncio
+    async def test_parallel_tool_outputs_are_labelled_by_their_calls(self, mock_llm):
+        """Test that each output of calls made in parallel is recorded under its own tool."""
+        agent = ChainlitSmartAgent.__new__(ChainlitSmartAgent)
+        agent._cleanup_done = True
+        agent_step = SimpleNamespace(output="", name="")
+        state = {"agent_step": agent_step, "thought_calls": set(), "pending_tools": {}, "tool_count": 0}
+        assistant_msg = MagicMock()
+        assistant_msg.stream_token = AsyncMock()
+
+        with patch.object(ChainlitSmartAgent, "_update_agent_step", AsyncMock()):
+            async for event in mock_llm("parallel-tool-calls").stream_events():
+                await agent.handle_event(event, state, assistant_msg)
+
+        assert "**Output from weather:**\n```\nsunny in Paris\n```" in agent_step.output
+        assert "**Output from news:**\n```\nfestival in Rome\n```" in agent_step.output
+        assert "Thought recorded." not in agent_step.output
+        assert state["pending_tools"] == {}
+        assert state["thought_calls"] == set()
+        assistant_msg.update.assert_not_called()
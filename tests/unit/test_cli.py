@@ -2,149 +2,178 @@
 Unit tests for the CLI module.
 """
 
-from unittest.mock import patch, MagicMock, call
+from unittest.mock import patch, MagicMock, AsyncMock, call
+import os
+import subprocess
 import sys
+from types import SimpleNamespace
+
 import pytest
 
+from smart_agent.commands.chat import run_chat_session
+from smart_agent.commands.init import init
+from smart_agent.commands.start import start, start_tools
+from smart_agent.commands.status import get_tools_status
+from smart_agent.commands.stop import stop
+from smart_agent.process_manager import ProcessManager
+from smart_agent.proxy_manager import (
+    LITELLM_CONTAINER_EXISTS_CMD,
+    LITELLM_CONTAINER_RM_CMD,
+    LITELLM_CONTAINER_STOP_CMD,
+    ProxyManager,
+)
+
+
+@pytest.fixture(autouse=True)
+def subprocess_mocks(monkeypatch):
+    """Keep every CLI test from spawning real processes, replacing subprocess.Popen and subprocess.run."""
+    # subprocess.run succeeds with no output by default, so no docker container looks present
+    completed = SimpleNamespace(returncode=0, stdout="", stderr="")
+    mocks = SimpleNamespace(popen=MagicMock(), run=MagicMock(return_value=completed))
+    monkeypatch.setattr("subprocess.Popen", mocks.popen)
+    monkeypatch.setattr("subprocess.run", mocks.run)
+    return mocks
+
 
 class TestCliCommands:
     """Test suite for Smart Agent CLI commands."""
 
-    @patch("smart_agent.commands.start.start_tools")
-    def test_start_cmd_functionality(self, mock_start_tools):
+    def test_start_cmd_functionality(self, mock_config_manager):
         """Test the functionality of start command without calling the Click command."""
-        # Import here to avoid circular imports
-        from smart_agent.commands.start import start
-
-        # Create a mock config manager
-        mock_config_manager = MagicMock()
-        
-        # Mock get_api_base_url to return a localhost URL
-        mock_config_manager.get_api_base_url.return_value = "http://localhost:8000"
-        
-        # Call the internal functionality directly
-        with patch("smart_agent.tool_manager.ConfigManager", return_value=mock_config_manager):
-            # We need to patch sys.exit to prevent the test from exiting
-            with patch("sys.exit"):
-                # We're testing the functionality, not the Click command itself
-                start.callback(config=None, background=True, debug=False)
-                
-                # Verify that start_tools was called
-                assert mock_start_tools.called
-                
-                # Note: We're not verifying launch_litellm_proxy was called
-                # as there are complex conditions that determine when it's called
+        # Call the internal functionality directly, patching sys.exit so the test keeps running
+        with patch("smart_agent.commands.start.start_tools") as mock_start_tools, \
+                patch("smart_agent.commands.start.ConfigManager", return_value=mock_config_manager), \
+                patch("sys.exit"):
+            start.callback(config=None, background=True, debug=False)
+
+        # Verify that start_tools was called with the mock configuration
+        assert mock_start_tools.called
+        assert mock_start_tools.call_args.args[0] is mock_config_manager
+
+        # Note: We're not verifying launch_litellm_proxy was called
+        # as there are complex conditions that determine when it's called
 
     @patch("smart_agent.process_manager.ProcessManager.stop_all_processes")
-    def test_stop_cmd_functionality(self, mock_stop_all):
+    def test_stop_cmd_functionality(self, mock_stop_all, subprocess_mocks):
         """Test the functionality of stop command without calling the Click command."""
-        # Import here to avoid circular imports
-        from smart_agent.commands.stop import stop
-
-        # Call the internal functionality directly
-        stop.callback(config=None, all=True, debug=False)
+        # Call the internal functionality directly, with the proxy container present
+        subprocess_mocks.run.return_value = SimpleNamespace(returncode=0, stdout="abc123\n", stderr="")
+        with patch("smart_agent.commands.stop.ConfigManager") as mock_config_manager_class:
+            stop.callback(config=None, all=True, debug=False)
 
-        # Verify stop_all_processes was called
+        # Verify stop_all_processes was called, without loading the configuration
         assert mock_stop_all.called
+        mock_config_manager_class.assert_not_called()
+
+        # Verify the proxy container was looked up, stopped and removed
+        assert [c.args[0] for c in subprocess_mocks.run.call_args_list] == [
+            LITELLM_CONTAINER_EXISTS_CMD,
+            LITELLM_CONTAINER_STOP_CMD,
+            LITELLM_CONTAINER_RM_CMD,
+        ]
+
+    def test_init_cmd_creates_missing_files_only(self, temp_dir, monkeypatch):
+        """Test that init copies the example configs once and leaves existing files unparsed."""
+        monkeypatch.chdir(temp_dir)
+
+        init.callback(config=None)
+
+        assert sorted(os.listdir(temp_dir)) == ["config.yaml", "litellm_config.yaml"]
+
+        # With both files in place, init reports them without loading the configuration
+        with patch("smart_agent.commands.init.ConfigManager") as mock_config_manager_class:
+            init.callback(config=None)
+
+        mock_config_manager_class.assert_not_called()
+
+    def test_cli_import_does_not_load_agent_sdk(self, monkeypatch):
+        """Test that loading the CLI leaves the agents SDK and OpenAI client to the chat command."""
+        # Restore the real subprocess module to import the CLI in a fresh interpreter
+        monkeypatch.undo()
+        result = subprocess.run(
+            [sys.executable, "-c", "import sys, smart_agent.cli; print('agents' in sys.modules, 'openai' in sys.modules)"],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
 
+        assert result.stdout.split() == ["False", "False"]
 
-    @pytest.mark.skip(reason="Need to fix this test")
-    @patch("subprocess.Popen")
-    @patch("os.environ")
-    def test_launch_tools_functionality(self, mock_environ, mock_popen):
-        """Test the functionality of launch_tools without directly calling it."""
-        # Import here to avoid circular imports
-        from smart_agent.commands.start import start_tools
-        from smart_agent.process_manager import ProcessManager
-
-        # Create a mock config manager
-        mock_config_manager = MagicMock()
-
-        # Mock get_all_tools to return our tool config
-        mock_config_manager.get_all_tools.return_value = {
-            "search_tool": {
-                "name": "Search Tool",
-                "url": "http://localhost:8001/sse",
+    @pytest.mark.asyncio
+    async def test_chat_session_closes_agent_on_same_loop(self):
+        """Test that the chat session cleans up the agent within the loop that ran the chat."""
+        chat_agent = MagicMock()
+        chat_agent.run_chat_loop = AsyncMock(side_effect=RuntimeError("input closed"))
+        chat_agent.aclose = AsyncMock()
+
+        with pytest.raises(RuntimeError):
+            await run_chat_session(chat_agent)
+
+        chat_agent.aclose.assert_awaited_once()
+
+    def test_tools_status_for_remote_tool(self):
+        """Test that a remote tool without a command is reported from its own config entry."""
+        tools_config = {
+            "remote_tool": {
                 "enabled": True,
-                "type": "uvx",
-                "repository": "search-tool",
+                "transport": "sse",
+                "url": "http://example.com/sse",
             }
         }
 
-        # Mock get_tools_config to return our tool config
-        mock_config_manager.get_tools_config = MagicMock(
-            return_value={
-                "search_tool": {
-                    "name": "Search Tool",
-                    "url": "http://localhost:8001/sse",
-                    "enabled": True,
-                    "type": "uvx",
-                    "repository": "search-tool",
-                    "command": "npx search-tool --port {port}"
-                }
-            }
-        )
+        def get_tool_command(tool_id):
+            raise ValueError("no command")
 
-        # Mock is_tool_enabled to return True for our test tool
-        mock_config_manager.is_tool_enabled.return_value = True
-
-        # Mock get_tool_config to return our tool config
-        mock_config_manager.get_tool_config.return_value = {
-            "name": "Search Tool",
-            "url": "http://localhost:8001/sse",
-            "enabled": True,
-            "type": "uvx",
-            "repository": "search-tool",
-            "command": "npx search-tool --port {port}"
-        }
+        config_manager = SimpleNamespace(get_tools_config=lambda: tools_config, get_tool_command=get_tool_command)
+        mock_process_manager = MagicMock()
 
-        # Mock get_tool_command to return a command
-        mock_config_manager.get_tool_command.return_value = "npx search-tool --port {port}"
+        status = get_tools_status(config_manager, mock_process_manager)
 
-        # Mock get_env_prefix to return a valid string
-        mock_config_manager.get_env_prefix.return_value = "SEARCH_TOOL"
+        assert status["remote_tool"]["running"] is True
+        assert status["remote_tool"]["url"] == "http://example.com/sse"
+        mock_process_manager.is_tool_running.assert_not_called()
 
-        # Mock os.path.exists and shutil.which to return True
-        with patch("os.path.exists", return_value=True):
-            with patch("shutil.which", return_value="/usr/bin/npx"):
-                # Create a mock process manager
-                mock_process_manager = MagicMock()
-                mock_process_manager.start_tool_process.return_value = (1234, 8001)
-                mock_process_manager.is_tool_running.return_value = False
 
-                # Call the function with our mocks
-                result = start_tools(mock_config_manager, process_manager=mock_process_manager)
+    @pytest.mark.skip(reason="Need to fix this test")
+    @patch("os.environ")
+    def test_launch_tools_functionality(self, mock_environ, mock_config_manager):
+        """Test the functionality of launch_tools without directly calling it."""
+        # Create a mock process manager
+        mock_process_manager = MagicMock()
+        mock_process_manager.start_tool_process.return_value = (1234, 8001)
+        mock_process_manager.is_tool_running.return_value = False
+
+        # Call the function with our mocks
+        result = start_tools(mock_config_manager, process_manager=mock_process_manager)
 
-                # Verify process manager was called to start the tool
-                assert mock_process_manager.start_tool_process.called
+        # Verify process manager was called to start the tool
+        assert mock_process_manager.start_tool_process.called
 
-    @patch("subprocess.Popen")
     @patch("os.path.exists", return_value=True)
-    def test_proxy_manager_launch_litellm_proxy(self, mock_exists, mock_popen):
+    def test_proxy_manager_launch_litellm_proxy(self, mock_exists, subprocess_mocks):
         """Test ProxyManager.launch_litellm_proxy function."""
-        # Create a mock config manager with required methods
-        mock_config_manager = MagicMock()
-
-        # Mock the litellm_config used for server settings
-        mock_config_manager.get_litellm_config.return_value = {
+        # Stub the config manager methods the proxy reads: the litellm_config used for
+        # server settings, the config path and the API base URL
+        litellm_config = {
             'enabled': True,
             'command': 'litellm --port {port}',
             'server': {'port': 4000, 'host': '0.0.0.0'},
             'model_list': [{'model_name': 'test-model'}]
         }
-
-        # Mock the config path
-        mock_config_manager.get_litellm_config_path.return_value = "/path/to/litellm_config.yaml"
+        config_manager = SimpleNamespace(
+            get_litellm_config=lambda: litellm_config,
+            get_litellm_config_path=lambda: "/path/to/litellm_config.yaml",
+            get_api_base_url=lambda: "http://localhost:4000",
+        )
 
         # Create a background parameter
         background = True
 
         # Create a proxy manager instance
-        from smart_agent.proxy_manager import ProxyManager
         proxy_manager = ProxyManager()
 
         # Call the function
-        result = proxy_manager.launch_litellm_proxy(mock_config_manager, background)
+        result = proxy_manager.launch_litellm_proxy(config_manager, background)
 
         # Verify subprocess.Popen was called to launch the proxy
-        assert mock_popen.called
+        assert subprocess_mocks.popen.called
@@ -0,0 +1,181 @@
+"""
+Unit tests for the CLI agent.
+"""
+
+import pytest
+from contextlib import AsyncExitStack
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from smart_agent.core.cli_agent import CLISmartAgent
+
+
+class TestCLISmartAgent:
+    """Test suite for the CLISmartAgent class."""
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("scenario, expected_reply", [
+        ("content-only", "Hello! How can I help?"),
+        ("tool-call", "It is sunny."),
+        ("multi-turn", "Let me check. It is sunny."),
+    ])
+    async def test_process_query_returns_assistant_messages(self, mock_llm, scenario, expected_reply):
+        """Test that the reply is assembled from the assistant messages, not the streamed tool text."""
+        agent = CLISmartAgent.__new__(CLISmartAgent)
+        agent.system_prompt = "You are a helpful assistant."
+        agent._cleanup_done = True
+
+        with patch("smart_agent.core.cli_agent.Runner.run_streamed", return_value=mock_llm(scenario)):
+            reply = await agent.process_query("What's the weather?", agent=SimpleNamespace(name="Assistant"))
+
+        assert reply == expected_reply
+
+    @pytest.mark.asyncio
+    async def test_parallel_tool_outputs_are_matched_to_their_calls(self, mock_llm, capsys):
+        """Test that with calls made in parallel, only the thought's output is skipped."""
+        agent = CLISmartAgent.__new__(CLISmartAgent)
+        agent.system_prompt = "You are a helpful assistant."
+        agent._cleanup_done = True
+
+        with patch("smart_agent.core.cli_agent.Runner.run_streamed", return_value=mock_llm("parallel-tool-calls")):
+            reply = await agent.process_query("Weather and news?", agent=SimpleNamespace(name="Assistant"))
+
+        output = capsys.readouterr().out
+        assert reply == "Done."
+        assert "sunny in Paris" in output
+        assert "festival in Rome" in output
+        assert "Thought recorded." not in output
+
+    @pytest.mark.asyncio
+    async def test_clear_reuses_cached_system_prompt(self):
+        """Test that clearing the chat resets the history from the prompt built at init."""
+        agent = CLISmartAgent.__new__(CLISmartAgent)
+        agent.api_key = "test-key"
+        agent.system_prompt = "You are a helpful assistant."
+        agent.mcp_servers = []
+
+        with patch("builtins.input", side_effect=["clear", "exit"]), \
+                patch("smart_agent.core.cli_agent.readline"), \
+                patch("smart_agent.agent.PromptGenerator.create_system_prompt") as mock_create_prompt:
+            await agent.run_chat_loop()
+
+        mock_create_prompt.assert_not_called()
+        assert agent.conversation_history == [{"role": "system", "content": "You are a helpful assistant."}]
+
+    @pytest.mark.asyncio
+    async def test_chat_loop_runs_turns_in_order_on_one_history(self, mock_llm, mock_openai_client):
+        """Test that a scripted session is driven through one chat loop, each turn seeing the last reply."""
+        agent = CLISmartAgent.__new__(CLISmartAgent)
+        agent.api_key = "test-key"
+        agent.system_prompt = "You are a helpful assistant."
+        agent.mcp_servers = []
+        agent.model_name = "gpt-4"
+        agent.openai_client = mock_openai_client
+        agent.langfuse_enabled = False
+        agent._cleanup_done = True
+
+        turns = iter(["content-only", "tool-call"])
+        histories = []
+
+        def run_streamed(_agent, history, **kwargs):
+            assert _agent.model_settings.parallel_tool_calls is True
+            histories.append([message["content"] for message in history])
+            return mock_llm(next(turns))
+
+        with patch("builtins.input", side_effect=["Hi", "What's the weather?", "exit"]), \
+                patch("smart_agent.core.cli_agent.readline"), \
+                patch("smart_agent.core.cli_agent.Runner.run_streamed", side_effect=run_streamed):
+            await agent.run_chat_loop()
+
+        assert histories == [
+            ["You are a helpful assistant.", "Hi"],
+            ["You are a helpful assistant.", "Hi", "Hello! How can I help?", "What's the weather?"],
+        ]
+        assert agent.conversation_history[-1] == {"role": "assistant", "content": "It is sunny."}
+
+    @pytest.mark.asyncio
+    async def test_chat_loop_reconnects_dropped_mcp_server(self, mock_llm, mock_openai_client):
+        """Test that a pooled MCP server whose connection dropped is closed and connected again."""
+        agent = CLISmartAgent.__new__(CLISmartAgent)
+        agent.api_key = "test-key"
+        agent.system_prompt = "You are a helpful assistant."
+        agent.model_name = "gpt-4"
+        agent.openai_client = mock_openai_client
+        agent.langfuse_enabled = False
+        agent._cleanup_done = True
+
+        events = []
+
+        class FakeServer:
+            name = "search"
+            client = MagicMock()
+
+            async def __aenter__(self):
+                events.append("connect")
+                return self
+
+            async def __aexit__(self, *exc_info):
+                events.append("close")
+
+        server = FakeServer()
+        server.client.is_connected.return_value = True
+        agent.mcp_servers = [server]
+
+        def run_streamed(_agent, history, **kwargs):
+            events.append(("turn", list(_agent.mcp_servers)))
+            # The connection drops while each turn runs
+            server.client.is_connected.return_value = False
+            return mock_llm("content-only")
+
+        with patch("builtins.input", side_effect=["Hi", "Hi again", "exit"]), \
+                patch("smart_agent.core.cli_agent.readline"), \
+                patch("smart_agent.core.cli_agent.Runner.run_streamed", side_effect=run_streamed):
+            await agent.run_chat_loop()
+
+        assert events == [
+            "connect", ("turn", [server]),
+            "close", "connect", ("turn", [server]),
+            "close",
+        ]
+
+    @pytest.mark.asyncio
+    async def test_chat_loop_failing_mcp_server_adds_no_cleanup_per_message(self, mock_llm, mock_openai_client):
+        """Test that retrying a server that never connects doesn't grow the session's exit stack."""
+        agent = CLISmartAgent.__new__(CLISmartAgent)
+        agent.api_key = "test-key"
+        agent.system_prompt = "You are a helpful assistant."
+        agent.model_name = "gpt-4"
+        agent.openai_client = mock_openai_client
+        agent.langfuse_enabled = False
+        agent._cleanup_done = True
+
+        attempts = []
+
+        class FailingServer:
+            name = "search"
+
+            async def __aenter__(self):
+                attempts.append("connect")
+                raise ConnectionError("connection refused")
+
+            async def __aexit__(self, *exc_info):
+                pass
+
+        agent.mcp_servers = [FailingServer()]
+
+        pushed = []
+
+        class RecordingExitStack(AsyncExitStack):
+            def push_async_callback(self, callback, *args, **kwargs):
+                pushed.append(callback)
+                return super().push_async_callback(callback, *args, **kwargs)
+
+        with patch("builtins.input", side_effect=["Hi", "Hi again", "Still there?", "exit"]), \
+                patch("smart_agent.core.cli_agent.readline"), \
+                patch("smart_agent.core.cli_agent.AsyncExitStack", RecordingExitStack), \
+                patch("smart_agent.core.cli_agent.Runner.run_streamed", side_effect=lambda *args, **kwargs: mock_llm("content-only")):
+            await agent.run_chat_loop()
+
+        # The server is retried on every message, but only the session's own cleanup is registered
+        assert attempts == ["connect"] * 3
+        assert len(pushed) == 1
@@ -137,3 +137,83 @@ class TestConfigManager:
         # Test getting model config
         assert config_manager.get_model_name() == "gpt-4"
         assert config_manager.get_model_temperature() == 0.7
+
+    def test_reloading_config_keeps_log_file_handler(self, temp_dir):
+        """Test that loading the same config again doesn't reopen the log file."""
+        import logging
+
+        log_file = os.path.join(temp_dir, "smart_agent.log")
+        config_path = os.path.join(temp_dir, "test_config.yaml")
+        with open(config_path, "w") as f:
+            yaml.dump({"logging": {"level": "INFO", "file": log_file}}, f)
+
+        def file_handlers():
+            return [h for h in logging.root.handlers if isinstance(h, logging.FileHandler)]
+
+        original_handlers = logging.root.handlers[:]
+        try:
+            with patch("smart_agent.tool_manager._root_logging_setup", None):
+                ConfigManager(config_path)
+                handlers = file_handlers()
+                ConfigManager(config_path)
+
+                assert len(handlers) == 1
+                assert file_handlers() == handlers
+                assert handlers[0].stream is not None
+        finally:
+            for handler in logging.root.handlers[:]:
+                logging.root.removeHandler(handler)
+                handler.close()
+            for handler in original_handlers:
+                logging.root.addHandler(handler)
+
+    def test_config_is_parsed_again_only_when_the_file_changes(self, temp_dir):
+        """Test that unchanged config files reuse their parse and each manager gets its own copy."""
+        config_path = os.path.join(temp_dir, "test_config.yaml")
+        with open(config_path, "w") as f:
+            yaml.dump({"model": {"name": "gpt-4"}}, f)
+
+        with patch.dict("smart_agent.tool_manager._YAML_CACHE", clear=True), \
+                patch("smart_agent.tool_manager.yaml.load", wraps=yaml.load) as mock_load:
+            first = ConfigManager(config_path)
+            first.config["model"]["name"] = "changed"
+            second = ConfigManager(config_path)
+
+            assert mock_load.call_count == 1
+            assert second.get_model_name() == "gpt-4"
+
+            # Rewriting the file invalidates the cached parse
+            with open(config_path, "w") as f:
+                yaml.dump({"model": {"name": "gpt-4o"}}, f)
+            stat = os.stat(config_path)
+            os.utime(config_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+            assert ConfigManager(config_path).get_model_name() == "gpt-4o"
+            assert mock_load.call_count == 2
+
+    def test_config_cache_file_skips_parsing_in_a_new_process(self, temp_dir):
+        """Test that the opt-in on-disk cache is reused until the config content changes."""
+        config_path = os.path.join(temp_dir, "test_config.yaml")
+        with open(config_path, "w") as f:
+            yaml.dump({"model": {"name": "gpt-4"}}, f)
+
+        cache_dir = os.path.join(temp_dir, "cache")
+        with patch.dict("os.environ", {"SMART_AGENT_CONFIG_CACHE": "1"}), \
+                patch("smart_agent.tool_manager.CONFIG_CACHE_DIR", cache_dir), \
+                patch("smart_agent.tool_manager.yaml.load", wraps=yaml.load) as mock_load:
+            # Clearing the in-memory cache before each load stands in for a fresh process
+            with patch.dict("smart_agent.tool_manager._YAML_CACHE", clear=True):
+                ConfigManager(config_path)
+            with patch.dict("smart_agent.tool_manager._YAML_CACHE", clear=True):
+                assert ConfigManager(config_path).get_model_name() == "gpt-4"
+
+            assert mock_load.call_count == 1
+            assert len(os.listdir(cache_dir)) == 1
+
+            with open(config_path, "w") as f:
+                yaml.dump({"model": {"name": "gpt-4o"}}, f)
+            with patch.dict("smart_agent.tool_manager._YAML_CACHE", clear=True):
+                assert ConfigManager(config_path).get_model_name() == "gpt-4o"
+
+            assert mock_load.call_count == 2
+            assert len(os.listdir(cache_dir)) == 1
@@ -0,0 +1,133 @@
+"""
+Unit tests for the MCP server module.
+"""
+
+import asyncio
+import pytest
+
+from smart_agent.core.mcp_server import MCPServerSse, MCPServerStreamableHttp
+
+
+class TestMCPServerSse:
+    """Test suite for the MCPServerSse class."""
+
+    @pytest.mark.asyncio
+    async def test_cleanup_is_idempotent(self):
+        """Test that cleanup can be called repeatedly without error."""
+        server = MCPServerSse(name="test_server", params={"url": "http://localhost:8000/sse"})
+        await server.connect()
+
+        await asyncio.wait_for(server.cleanup(), timeout=5.0)
+        await asyncio.wait_for(server.cleanup(), timeout=5.0)
+
+        assert server._connected is False
+
+    def test_transport_uses_configured_headers(self):
+        """Test that configured headers and read timeout are passed to the SSE transport."""
+        server = MCPServerSse(
+            name="test_server",
+            params={
+                "url": "http://localhost:8000/sse",
+                "headers": {"Authorization": "Bearer token"},
+                "sse_read_timeout": 60,
+            },
+        )
+
+        assert server.client.transport.headers == {"Authorization": "Bearer token"}
+        assert server.client.transport.sse_read_timeout.total_seconds() == 60
+
+
+class TestMCPServerStreamableHttp:
+    """Test suite for the MCPServerStreamableHttp class."""
+
+    @pytest.mark.asyncio
+    async def test_cleanup_does_not_deadlock_on_own_exit_stack(self):
+        """Test that cleanup returns when the server is registered on its own exit stack."""
+        server = MCPServerStreamableHttp(name="test_server", params={"url": "http://localhost:8000/mcp"})
+        await server.connect()
+
+        # Closing the exit stack re-enters cleanup() through __aexit__
+        server.exit_stack.push_async_exit(server)
+
+        await asyncio.wait_for(server.cleanup(), timeout=5.0)
+
+        assert server._connected is False
+
+    @pytest.mark.asyncio
+    async def test_list_tools_is_cached_until_reconnect(self):
+        """Test that the tools list is fetched once per connection when caching is enabled."""
+        from unittest.mock import AsyncMock
+
+        server = MCPServerStreamableHttp(
+            name="test_server",
+            params={"url": "http://localhost:8000/mcp"},
+            cache_tools_list=True,
+        )
+        server.connected_client = AsyncMock()
+        server.connected_client.list_tools.return_value = ["tool"]
+        await server.connect()
+
+        assert await server.list_tools() == ["tool"]
+        assert await server.list_tools() == ["tool"]
+        assert server.connected_client.list_tools.await_count == 1
+
+        # A new connection refetches the tools list
+        await server.connect()
+        await server.list_tools()
+        assert server.connected_client.list_tools.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_concurrent_list_tools_share_one_request(self):
+        """Test that concurrent list_tools calls are coalesced into a single fetch."""
+        from unittest.mock import AsyncMock
+
+        server = MCPServerStreamableHttp(name="test_server", params={"url": "http://localhost:8000/mcp"})
+        release = asyncio.Event()
+
+        async def slow_list_tools():
+            await release.wait()
+            return ["tool"]
+
+        server.connected_client = AsyncMock()
+        server.connected_client.list_tools.side_effect = slow_list_tools
+        await server.connect()
+
+        tasks = [asyncio.create_task(server.list_tools()) for _ in range(3)]
+        await asyncio.sleep(0)
+        release.set()
+
+        assert await asyncio.gather(*tasks) == [["tool"]] * 3
+        assert server.connected_client.list_tools.await_count == 1
+
+    def test_http2_client_factory_is_configurable(self):
+        """Test that the HTTP/2 client factory is only used when http2 is enabled."""
+        from smart_agent.core.mcp_server import HTTP2_AVAILABLE, _http2_client_factory
+
+        server = MCPServerStreamableHttp(name="test_server", params={"url": "http://localhost:8000/mcp"})
+        expected = _http2_client_factory if HTTP2_AVAILABLE else None
+        assert server.client.transport.httpx_client_factory is expected
+
+        server = MCPServerStreamableHttp(
+            name="test_server",
+            params={"url": "http://localhost:8000/mcp", "http2": False},
+        )
+        assert server.client.transport.httpx_client_factory is None
+
+    @pytest.mark.asyncio
+    async def test_ping_skipped_after_recent_activity(self):
+        """Test that ping only does a round-trip when the server has been quiet."""
+        from unittest.mock import AsyncMock
+
+        server = MCPServerStreamableHttp(name="test_server", params={"url": "http://localhost:8000/mcp"})
+        server.connected_client = AsyncMock()
+        server.connected_client.ping.return_value = True
+        await server.connect()
+
+        # Nothing has been heard from a new session yet
+        assert await server.ping() is True
+        assert server.connected_client.ping.await_count == 1
+
+        # A tool call just succeeded, so the server is known to be alive
+        await server.call_tool("echo", {"x": "hi"})
+        assert await server.ping() is True
+        assert server.connected_client.ping.await_count == 1
@@ -0,0 +1,36 @@
+"""
+Unit tests for the SmoothStreamWrapper.
+"""
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from smart_agent.core.smooth_stream import SmoothStreamWrapper
+
+
+class TestSmoothStreamWrapper:
+    """Test suite for the SmoothStreamWrapper class."""
+
+    @pytest.mark.asyncio
+    async def test_tokens_are_batched_whole(self):
+        """Test that tokens are sent in batches of whole tokens and nothing is lost."""
+        message = MagicMock()
+        message.content = ""
+        message.streaming = True
+        message.stream_token = AsyncMock()
+        message.update = AsyncMock()
+
+        wrapper = SmoothStreamWrapper(message, batch_size=2, flush_interval=0.001)
+        tokens = ["Hello", ", ", "world", "!", " How", " are", " you?"]
+        for token in tokens:
+            await wrapper.stream_token(token)
+
+        assert wrapper.content == "".join(tokens)
+
+        await wrapper.update()
+
+        sent = [call.args[0] for call in message.stream_token.await_args_list]
+        assert "".join(sent) == "".join(tokens)
+        # Every batch is made of whole tokens
+        assert sent == ["Hello, ", "world!", " How are", " you?"]
+        message.update.assert_awaited_once()
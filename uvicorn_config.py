@@ -4,6 +4,19 @@ Custom uvicorn configuration to suppress WebSocket logs.
 
 import logging
 
+# Loggers silenced through the null handler; dictConfig only reads logger entries, so
+# they all share one entry
+NULL_LOGGER_NAMES = (
+    "uvicorn.websockets",
+    "websockets",
+    "websockets.protocol",
+    "websockets.client",
+    "websockets.server",
+    "socketio",
+    "engineio",
+)
+_NULL_LOGGER = {"handlers": ["null"], "level": "CRITICAL", "propagate": False}
+
 # Configure logging
 LOGGING_CONFIG = {
     "version": 1,
@@ -39,15 +52,9 @@ LOGGING_CONFIG = {
         "uvicorn.error": {"handlers": ["default"], "level": "INFO", "propagate": False},
         "uvicorn.access": {"handlers": ["access"], "level": "INFO", "propagate": False},
         # Set WebSocket loggers to use null handler
-        "uvicorn.websockets": {"handlers": ["null"], "level": "CRITICAL", "propagate": False},
-        "websockets": {"handlers": ["null"], "level": "CRITICAL", "propagate": False},
-        "websockets.protocol": {"handlers": ["null"], "level": "CRITICAL", "propagate": False},
-        "websockets.client": {"handlers": ["null"], "level": "CRITICAL", "propagate": False},
-        "websockets.server": {"handlers": ["null"], "level": "CRITICAL", "propagate": False},
-        "socketio": {"handlers": ["null"], "level": "CRITICAL", "propagate": False},
-        "engineio": {"handlers": ["null"], "level": "CRITICAL", "propagate": False},
+        **{name: _NULL_LOGGER for name in NULL_LOGGER_NAMES},
     },
 }
 
 # Set log levels
-log_level = "info"
\ No newline at end of file
+log_level = "info"